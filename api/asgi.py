@@ -0,0 +1,461 @@
+"""
+ASGI entry point: ``uvicorn api.asgi:app``.
+
+The read endpoints of book_routes.py and insights.py are served here as
+coroutines on an async SQLAlchemy engine (asyncpg / aiosqlite), so a
+request waiting on the database holds no thread. Everything else (auth,
+admin, docs, and the CSV fallback of the insights) is delegated to the
+Flask app through an ASGI-to-WSGI adapter. Rate limits and compression
+follow api/ratelimit.py and api/compression.py.
+"""
+
+import json
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware import Middleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_accept_header
+
+from api.compression import COMPRESSIBLE_MIMETYPES, add_vary, negotiate
+from api.db_routing import REPLICA_BIND_PREFIX, pick_replica, pool_options
+from api.embedded import is_sqlite_file, tune_engine
+from api.extensions import db
+from api.main import app as flask_app
+from api.ratelimit import EXEMPT
+from api.repositories.async_book_repository import AsyncBookRepository
+from api.repositories.book_repository import SORT_CHOICES
+from api.routes.insights import _book_record, _rating_key
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+wsgi_app = WSGIMiddleware(flask_app)
+rate_limiter = flask_app.extensions["ratelimit"]
+url_adapter = flask_app.url_map.bind("localhost")
+
+
+def async_url(url):
+    """
+    Swap the sync driver of a database URL for its asyncio counterpart.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def _create_engines():
+    # Reuse the URLs Flask-SQLAlchemy resolved (e.g. relative SQLite paths).
+    with flask_app.app_context():
+        urls = {key: engine.url for key, engine in db.engines.items()}
+
+    engines = {
+        None: create_async_engine(async_url(urls.pop(None)), **pool_options("DB_"))
+    }
+    replica_options = pool_options("DB_REPLICA_", fallback_prefix="DB_")
+    for key, url in urls.items():
+        if key and key.startswith(REPLICA_BIND_PREFIX):
+            engines[key] = create_async_engine(async_url(url), **replica_options)
+
+    if flask_app.config["SQLITE_EMBEDDED"]:
+        for engine in engines.values():
+            if is_sqlite_file(engine.url):
+                tune_engine(engine.sync_engine, flask_app.config["SQLITE_MMAP_SIZE"])
+    return engines
+
+
+engines = {}
+sessionmakers = {}
+
+
+def read_session():
+    """
+    Open a session reading from one replica for its whole lifetime when
+    replicas are configured, mirroring RoutingSession.
+    """
+    return sessionmakers[pick_replica(sessionmakers)]()
+
+
+class JSONResponse(Response):
+    """
+    JSON encoded like Flask's jsonify (sorted keys, compact separators), so
+    both serving modes return identical bodies.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return (
+            json.dumps(content, sort_keys=True, separators=(",", ":")) + "\n"
+        ).encode("utf-8")
+
+
+class DelegateToFlask(Response):
+    """
+    Hand the request to the WSGI app, e.g. for the pandas CSV fallback.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    async def __call__(self, scope, receive, send):
+        await wsgi_app(scope, receive, send)
+
+
+class RateLimitMiddleware:
+    """
+    Apply api/ratelimit.py to every request, async or delegated to Flask.
+    The endpoint is resolved through Flask's URL map, so the `expensive`
+    and `exempt` markers on the Flask views apply here too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def _call_store(self, fn, *args):
+        if rate_limiter.store.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not rate_limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        try:
+            endpoint, _ = url_adapter.match(scope["path"], method=scope["method"])
+        except HTTPException:
+            endpoint = None
+
+        policy = rate_limiter.policy(flask_app, endpoint)
+        if policy == EXEMPT:
+            await self.app(scope, receive, send)
+            return
+
+        with flask_app.app_context():
+            client = rate_limiter.client_id(
+                headers.get("authorization"),
+                scope["client"][0] if scope.get("client") else None,
+                headers.get("x-forwarded-for"),
+            )
+        rejection, slot = await self._call_store(rate_limiter.admit, policy, client)
+        if rejection is not None:
+            response = JSONResponse(
+                {"error": rejection.error},
+                status_code=rejection.status,
+                headers={"Retry-After": str(rejection.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self._call_store(rate_limiter.release, slot)
+
+
+class CompressionMiddleware:
+    """
+    Compress the async routes' responses with the Flask app's Compress
+    settings and memo cache. Responses produced by Flask are already
+    encoded and pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not flask_app.config["COMPRESS_ENABLED"]:
+            await self.app(scope, receive, send)
+            return
+
+        compress = flask_app.extensions["compress"]
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(
+            parse_accept_header(request_headers.get("accept-encoding"))
+        )
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            # First body chunk: decide on the encoding before sending headers.
+            pending, start = start, None
+            status = pending["status"]
+            headers = MutableHeaders(raw=list(pending["headers"]))
+            body = message.get("body", b"")
+            mimetype = headers.get("content-type", "").split(";")[0].strip()
+
+            if (
+                mimetype in COMPRESSIBLE_MIMETYPES
+                and "content-encoding" not in headers
+                and status >= 200
+                and status not in (204, 304)
+            ):
+                add_vary(headers)
+                if (
+                    encoding
+                    and not message.get("more_body", False)
+                    and len(body) >= compress.min_size
+                ):
+                    cacheable = (
+                        scope["method"] == "GET"
+                        and status == 200
+                        and "authorization" not in request_headers
+                    )
+                    cache_key = (
+                        f"{scope['path']}?{scope['query_string'].decode('latin-1')}"
+                        if cacheable
+                        else None
+                    )
+                    body = compress.encode(body, encoding, cache_key)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+
+            await send({**pending, "headers": headers.raw})
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _int_arg(request, name, default):
+    try:
+        return int(request.query_params.get(name, default))
+    except ValueError:
+        return default
+
+
+def _float_arg(request, name):
+    try:
+        value = request.query_params.get(name)
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _paginated(pagination):
+    return {
+        "books": [b.to_dict() for b in pagination.items],
+        "meta": {
+            "page": pagination.page,
+            "per_page": pagination.per_page,
+            "total_pages": pagination.pages,
+            "total_items": pagination.total,
+            "has_next": pagination.has_next,
+            "has_prev": pagination.has_prev,
+        },
+    }
+
+
+def _sort_error(sort):
+    if not sort or sort in SORT_CHOICES:
+        return None
+    return JSONResponse(
+        {"error": f"Invalid sort, expected one of: {', '.join(SORT_CHOICES)}"},
+        status_code=400,
+    )
+
+
+async def get_books(request):
+    page = _int_arg(request, "page", 1)
+    per_page = _int_arg(request, "per_page", 25)
+    sort = request.query_params.get("sort")
+
+    error = _sort_error(sort)
+    if error:
+        return error
+
+    async with read_session() as session:
+        pagination = await AsyncBookRepository(session).get_all_paginated(
+            page, per_page, sort
+        )
+        return JSONResponse(_paginated(pagination))
+
+
+async def search_books(request):
+    title = request.query_params.get("title")
+    category = request.query_params.get("category")
+    min_rating = _float_arg(request, "min_rating")
+    max_price = _float_arg(request, "max_price")
+    page = _int_arg(request, "page", 1)
+    per_page = _int_arg(request, "per_page", 25)
+    sort = request.query_params.get("sort")
+    with_facets = request.query_params.get("facets", "false").lower() in ("1", "true")
+
+    if not any([title, category, min_rating, max_price]):
+        return JSONResponse(
+            {
+                "error": "At least one search parameter is required (title, category, min_rating, max_price)"
+            },
+            status_code=400,
+        )
+
+    error = _sort_error(sort)
+    if error:
+        return error
+
+    async with read_session() as session:
+        repository = AsyncBookRepository(session)
+        pagination = await repository.search(
+            title=title,
+            category=category,
+            min_rating=min_rating,
+            max_price=max_price,
+            page=page,
+            per_page=per_page,
+            sort=sort,
+        )
+        content = _paginated(pagination)
+        if with_facets:
+            content["meta"]["facets"] = await repository.search_facets(
+                title=title,
+                category=category,
+                min_rating=min_rating,
+                max_price=max_price,
+            )
+        return JSONResponse(content)
+
+
+async def get_book(request):
+    async with read_session() as session:
+        b = await AsyncBookRepository(session).get_by_id(request.path_params["book_id"])
+
+    if not b:
+        return JSONResponse({"error": "Book not found"}, status_code=404)
+    return JSONResponse(b.to_dict())
+
+
+async def get_categories(request):
+    async with read_session() as session:
+        categories = await AsyncBookRepository(session).list_categories()
+    return JSONResponse({"categories": categories})
+
+
+async def get_stats_overview(request):
+    try:
+        async with read_session() as session:
+            repository = AsyncBookRepository(session)
+            total, avg_price = await repository.count_and_average_price()
+            distribution = await repository.rating_distribution() if total else {}
+    except SQLAlchemyError:
+        return DelegateToFlask()
+
+    if not total:
+        return DelegateToFlask()
+
+    return JSONResponse(
+        {
+            "total_books": total,
+            "average_price": round(avg_price / 100, 2),
+            "rating_distribution": {_rating_key(r): c for r, c in distribution.items()},
+        }
+    )
+
+
+async def _rows_or_fallback(query):
+    """
+    Run `query(repository)`; return None when the Flask fallback should
+    answer instead (database unreachable, or no books imported yet).
+    """
+    try:
+        async with read_session() as session:
+            repository = AsyncBookRepository(session)
+            rows = await query(repository)
+            if not rows and not await repository.has_books():
+                return None
+            return rows
+    except SQLAlchemyError:
+        return None
+
+
+async def get_stats_categories(request):
+    rows = await _rows_or_fallback(lambda r: r.category_stats())
+    if rows is None:
+        return DelegateToFlask()
+
+    return JSONResponse(
+        {
+            category: {"count": count, "avg_price": round(avg_price / 100, 2)}
+            for category, (count, avg_price) in rows.items()
+        }
+    )
+
+
+async def get_top_rated(request):
+    books = await _rows_or_fallback(lambda r: r.get_by_rating(5))
+    if books is None:
+        return DelegateToFlask()
+    return JSONResponse([_book_record(b) for b in books])
+
+
+async def get_price_range(request):
+    min_p = _float_arg(request, "min")
+    max_p = _float_arg(request, "max")
+
+    if min_p is None or max_p is None:
+        return JSONResponse({"error": "Provide min and max price"}, status_code=400)
+
+    books = await _rows_or_fallback(lambda r: r.get_by_price_range(min_p, max_p))
+    if books is None:
+        return DelegateToFlask()
+    return JSONResponse([_book_record(b) for b in books])
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # RateLimitMiddleware charges every request once; the Flask hooks must
+    # not charge the delegated ones again.
+    rate_limiter.enforce_in_app = False
+    # The async routes never reach the Flask hook that starts it.
+    if flask_app.config["CATALOG_LISTENER_ENABLED"]:
+        flask_app.extensions["catalog_listener"].start()
+    engines.update(_create_engines())
+    for key, engine in engines.items():
+        sessionmakers[key] = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        yield
+    finally:
+        flask_app.extensions["catalog_listener"].stop()
+        for engine in engines.values():
+            await engine.dispose()
+        engines.clear()
+        sessionmakers.clear()
+
+
+routes = [
+    Route("/api/v1/books", get_books, methods=["GET"]),
+    Route("/api/v1/books/search", search_books, methods=["GET"]),
+    Route("/api/v1/books/top-rated", get_top_rated, methods=["GET"]),
+    Route("/api/v1/books/price-range", get_price_range, methods=["GET"]),
+    Route("/api/v1/books/{book_id:int}", get_book, methods=["GET"]),
+    Route("/api/v1/categories", get_categories, methods=["GET"]),
+    Route("/api/v1/stats/overview", get_stats_overview, methods=["GET"]),
+    Route("/api/v1/stats/categories", get_stats_categories, methods=["GET"]),
+    Mount("/", app=wsgi_app),
+]
+
+app = Starlette(
+    routes=routes,
+    lifespan=lifespan,
+    middleware=[Middleware(RateLimitMiddleware), Middleware(CompressionMiddleware)],
+)
@@ -0,0 +1,86 @@
+"""
+In-process caches keyed by the catalog version.
+
+The catalog version is bumped whenever books are written through
+BookRepository, so cache entries built from an older catalog stop being
+looked up and age out of their LRU. Writes made by other processes are
+picked up by the CatalogListener (api/invalidation.py), which reports the
+version stored in the database to :func:`observe_catalog_version`.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+_version_lock = threading.Lock()
+_catalog_version = 0
+# Last version read from the database's catalog_version row.
+_stored_version = None
+_change_callbacks = []
+
+
+def catalog_version() -> int:
+    return _catalog_version
+
+
+def observe_catalog_version(stored_version: int) -> bool:
+    """
+    Record the catalog version read from the database and bump the local
+    one if it differs from the last value seen (or none was seen yet, as
+    entries may have been cached before). Returns True if it was bumped.
+    """
+    global _catalog_version, _stored_version
+    with _version_lock:
+        if stored_version == _stored_version:
+            return False
+        _stored_version = stored_version
+        _catalog_version += 1
+
+    for callback in _change_callbacks:
+        try:
+            callback()
+        except Exception:
+            logging.exception("Catalog change callback failed")
+    return True
+
+
+def on_catalog_change(callback):
+    """
+    Register `callback` to run whenever a new database catalog version is
+    observed: once when each process first sees it, then after every import.
+    """
+    _change_callbacks.append(callback)
+    return callback
+
+
+class LRUCache:
+    """
+    Thread-safe mapping that keeps at most `maxsize` entries, evicting the
+    least recently used one.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
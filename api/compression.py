@@ -0,0 +1,181 @@
+"""
+Negotiated gzip / brotli response compression.
+
+Bodies of compressible responses above COMPRESS_MIN_SIZE are encoded with
+the best encoding the client accepts (brotli when the optional `brotli`
+package is installed, otherwise gzip). Streamed responses are compressed
+chunk by chunk. Compressed bodies of public GET responses are memoized per
+catalog version, path and encoding, and only reused when the uncompressed
+body is byte-identical, so hot listing pages are compressed once.
+"""
+
+import hashlib
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import request
+from werkzeug.datastructures import Accept
+
+from api.cache import LRUCache, catalog_version
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+
+def available_encodings() -> list[str]:
+    """
+    Supported encodings in order of preference.
+    """
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def negotiate(accept_encodings: Accept) -> Optional[str]:
+    """
+    The supported encoding with the highest quality in the client's
+    Accept-Encoding, ties going to the server's preference.
+    """
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class StreamCompressor:
+    """
+    Incremental encoder; every chunk is flushed so streamed responses reach
+    the client as they are produced.
+    """
+
+    def __init__(self, encoding: str, gzip_level: int = 6, brotli_quality: int = 5):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: zlib stream with a gzip header and trailer.
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress_bytes(
+    body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5
+) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def add_vary(headers, value: str = "Accept-Encoding"):
+    vary = {v.strip().lower() for v in headers.get("Vary", "").split(",") if v.strip()}
+    if value.lower() not in vary:
+        headers["Vary"] = f"{headers['Vary']}, {value}" if vary else value
+
+
+class Compress:
+    """
+    Flask extension compressing responses in an after_request hook.
+    """
+
+    def __init__(self, app=None):
+        self.cache = LRUCache(0)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESS_ENABLED", True)
+        app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+        app.config.setdefault("COMPRESS_LEVEL", 6)
+        app.config.setdefault("COMPRESS_BROTLI_QUALITY", 5)
+        app.config.setdefault("COMPRESS_CACHE_SIZE", 256)
+
+        self.min_size = app.config["COMPRESS_MIN_SIZE"]
+        self.gzip_level = app.config["COMPRESS_LEVEL"]
+        self.brotli_quality = app.config["COMPRESS_BROTLI_QUALITY"]
+        self.cache = LRUCache(app.config["COMPRESS_CACHE_SIZE"])
+
+        app.extensions["compress"] = self
+        if app.config["COMPRESS_ENABLED"]:
+            app.after_request(self.after_request)
+
+    def encode(self, body: bytes, encoding: str, cache_key=None) -> bytes:
+        """
+        Compress `body`, reusing the memoized payload for `cache_key` when
+        it was built from the same bytes.
+        """
+        if cache_key is None:
+            return compress_bytes(body, encoding, self.gzip_level, self.brotli_quality)
+
+        key = (catalog_version(), encoding, cache_key)
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+
+        payload = compress_bytes(body, encoding, self.gzip_level, self.brotli_quality)
+        self.cache.set(key, (digest, payload))
+        return payload
+
+    def stream(self, chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+        compressor = StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk)
+        yield compressor.finish()
+
+    def after_request(self, response):
+        if (
+            response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        add_vary(response.headers)
+        encoding = negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self.stream(response.iter_encoded(), encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            # Only public reads are memoized; per-user responses would just
+            # churn the cache.
+            cacheable = (
+                request.method == "GET"
+                and response.status_code == 200
+                and "Authorization" not in request.headers
+            )
+            cache_key = request.full_path if cacheable else None
+            response.set_data(self.encode(body, encoding, cache_key))
+
+        response.headers["Content-Encoding"] = encoding
+        return response
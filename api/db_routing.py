@@ -0,0 +1,124 @@
+"""
+Read-replica routing for the Flask-SQLAlchemy session.
+
+Replicas are configured as binds named ``replica_<n>``. Repository methods
+decorated with :func:`replica_read` mark the session as read-only for their
+duration, and :class:`RoutingSession` then sends their queries to a replica.
+Everything else, including every flush and commit, uses the primary engine.
+"""
+
+import os
+import random
+import threading
+import time
+from functools import wraps
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND_PREFIX = "replica_"
+_READ_FLAG = "replica_read"
+_REPLICA_KEY = "replica_bind"
+
+# Monotonic deadline until which reads stay on the primary after a write.
+_pin_lock = threading.Lock()
+_primary_pinned_until = 0.0
+
+
+def pool_options(prefix: str, fallback_prefix: str | None = None) -> dict:
+    """
+    Engine pool options from environment variables such as DB_POOL_SIZE.
+    Unset variables are left to SQLAlchemy's defaults (or taken from
+    `fallback_prefix`, so replicas inherit the primary's tuning).
+    """
+    settings = {
+        "POOL_SIZE": ("pool_size", int),
+        "MAX_OVERFLOW": ("max_overflow", int),
+        "POOL_TIMEOUT": ("pool_timeout", float),
+        "POOL_RECYCLE": ("pool_recycle", int),
+        "POOL_PRE_PING": ("pool_pre_ping", lambda v: v in ("1", "true", "True")),
+    }
+    options = {}
+    for suffix, (option, cast) in settings.items():
+        value = os.getenv(f"{prefix}{suffix}")
+        if value is None and fallback_prefix:
+            value = os.getenv(f"{fallback_prefix}{suffix}")
+        if value is not None:
+            options[option] = cast(value)
+    return options
+
+
+def replica_binds(urls: list[str]) -> dict:
+    options = pool_options("DB_REPLICA_", fallback_prefix="DB_")
+    return {
+        f"{REPLICA_BIND_PREFIX}{i}": {"url": url, **options}
+        for i, url in enumerate(urls)
+    }
+
+
+def pin_primary(seconds: float):
+    """
+    Route reads in this process to the primary for `seconds`, so data just
+    written is visible even if the replicas lag behind.
+    """
+    global _primary_pinned_until
+    if seconds <= 0:
+        return
+    with _pin_lock:
+        _primary_pinned_until = max(_primary_pinned_until, time.monotonic() + seconds)
+
+
+def primary_pinned() -> bool:
+    return time.monotonic() < _primary_pinned_until
+
+
+def pick_replica(keys) -> str | None:
+    """
+    The replica a session reads from, or None for the primary.
+    """
+    replicas = [key for key in keys if key and key.startswith(REPLICA_BIND_PREFIX)]
+    if replicas and not primary_pinned():
+        return random.choice(replicas)
+    return None
+
+
+class RoutingSession(Session):
+    """
+    Session sending replica reads to one replica, chosen on its first read
+    and kept until it is closed, so the queries of a request (a page and
+    its count, say) see the same replica.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(_READ_FLAG) and not self._flushing:
+            if _REPLICA_KEY not in self.info:
+                self.info[_REPLICA_KEY] = pick_replica(self._db.engines)
+            key = self.info[_REPLICA_KEY]
+            if key is not None and not primary_pinned():
+                return self._db.engines[key]
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def close(self):
+        # Flask-SQLAlchemy closes the session at the end of the app context.
+        self.info.pop(_REPLICA_KEY, None)
+        super().close()
+
+
+def replica_read(fn):
+    """
+    Run a read-only repository method against a replica when one is
+    configured.
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        session = current_app.extensions["sqlalchemy"].session()
+        previous = session.info.get(_READ_FLAG, False)
+        session.info[_READ_FLAG] = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            session.info[_READ_FLAG] = previous
+
+    return wrapper
@@ -0,0 +1,95 @@
+"""
+Embedded SQLite mode, for instances serving a local SQLite file (the
+fallback when DATABASE_URL is unset).
+
+The primary engine is the only writer. Its connections switch the file to
+WAL journaling, so readers keep reading the last committed catalog while an
+import is writing instead of waiting for it, and commit with
+synchronous=NORMAL, which stays safe in WAL mode (a power loss may only
+drop the last commits). Reads go through a second, shared pool of read-only
+connections on the same file, configured as a replica bind so the routing
+of api/db_routing.py applies unchanged. All connections memory-map the
+first SQLITE_MMAP_SIZE bytes of the file.
+"""
+
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def is_sqlite_file(url) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def _read_only(url) -> bool:
+    return make_url(url).query.get("mode") == "ro"
+
+
+def reader_url(database_url) -> str:
+    """
+    URL of read-only connections to the SQLite file of `database_url`.
+    """
+    url = make_url(database_url)
+    if not url.query.get("uri"):
+        url = url.set(database=f"file:{url.database}")
+    url = url.update_query_dict({"mode": "ro", "uri": "true"})
+    return url.render_as_string(hide_password=False)
+
+
+def tune_engine(engine, mmap_size: int):
+    """
+    Set the embedded mode PRAGMAs on every new connection of `engine`.
+    """
+    read_only = _read_only(engine.url)
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if read_only:
+                cursor.execute("PRAGMA query_only = ON")
+            else:
+                cursor.execute("PRAGMA journal_mode = WAL")
+                cursor.execute("PRAGMA synchronous = NORMAL")
+            cursor.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+        finally:
+            cursor.close()
+
+
+class EmbeddedSQLite:
+    """
+    Flask extension tuning the SQLite engines of Flask-SQLAlchemy. Add the
+    :func:`reader_url` bind to the config before ``db.init_app`` and call
+    this after it.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SQLITE_EMBEDDED", True)
+        app.config.setdefault("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+
+        app.extensions["embedded_sqlite"] = self
+        if not app.config["SQLITE_EMBEDDED"]:
+            return
+
+        with app.app_context():
+            engines = app.extensions["sqlalchemy"].engines
+            for engine in engines.values():
+                if is_sqlite_file(engine.url):
+                    tune_engine(engine, app.config["SQLITE_MMAP_SIZE"])
+
+            # WAL is a property of the file: switch it before any reader
+            # opens it. A missing file is created by the first write.
+            primary = engines[None]
+            if is_sqlite_file(primary.url) and os.path.exists(primary.url.database):
+                with primary.connect():
+                    pass
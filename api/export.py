@@ -0,0 +1,50 @@
+"""
+Encoders for the streaming catalog export (/books/export).
+
+They take the batches of rows produced by BookRepository.iter_export and
+yield one encoded chunk per batch, so the response is written while the
+server-side cursor is still being read and memory use does not depend on
+the size of the catalog.
+"""
+
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+from api.repositories.book_repository import EXPORT_FIELDS
+
+
+def _record(row) -> dict:
+    record = row._asdict()
+    # Same units as Book.to_dict(): currency rather than cents.
+    record["price"] = record["price"] / 100
+    return record
+
+
+def ndjson_chunks(batches: Iterable[list]) -> Iterator[str]:
+    for batch in batches:
+        yield "".join(
+            json.dumps(_record(row), separators=(",", ":")) + "\n" for row in batch
+        )
+
+
+def csv_chunks(batches: Iterable[list]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(_record(row) for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# format -> (mimetype, file extension, encoder)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson", ndjson_chunks),
+    "csv": ("text/csv", "csv", csv_chunks),
+}
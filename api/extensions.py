@@ -1,3 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from api.compression import Compress
+from api.db_routing import RoutingSession
+from api.embedded import EmbeddedSQLite
+from api.invalidation import CatalogListener
+from api.ratelimit import RateLimiter
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+compress = Compress()
+rate_limiter = RateLimiter()
+catalog_listener = CatalogListener()
+embedded_sqlite = EmbeddedSQLite()
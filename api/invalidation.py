@@ -0,0 +1,150 @@
+"""
+Cross-process cache invalidation.
+
+Every write through BookRepository moves the `catalog_version` row. On
+Postgres the writer also sends NOTIFY on CATALOG_NOTIFY_CHANNEL when it
+commits. A :class:`CatalogListener` thread in each worker process LISTENs
+for it and hands the new version to :func:`api.cache.observe_catalog_version`,
+which invalidates the local caches. While LISTEN works it only reads the
+version row every CATALOG_LISTEN_POLL_INTERVAL seconds, in case a
+notification was missed; on SQLite it polls the row every
+CATALOG_POLL_INTERVAL seconds.
+"""
+
+import os
+import select
+import threading
+import time
+
+from sqlalchemy import text
+
+from api.cache import observe_catalog_version
+
+# Longest wait between two attempts after repeated failures.
+MAX_BACKOFF = 60.0
+
+
+def _listens(engine) -> bool:
+    return engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+
+def publish_catalog_version(session, version: int, channel: str):
+    """
+    Announce `version` to the other processes when the session's current
+    transaction commits (Postgres only; elsewhere they poll).
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(
+            text("SELECT pg_notify(:channel, :version)"),
+            {"channel": channel, "version": str(version)},
+        )
+
+
+def read_catalog_version(engine):
+    with engine.connect() as conn:
+        return conn.scalar(text("SELECT version FROM catalog_version WHERE id = 1"))
+
+
+class CatalogListener:
+    """
+    Flask extension running the listener thread. Threads do not survive a
+    fork, so it is started lazily by the first request of each process
+    (or explicitly with :meth:`start`).
+    """
+
+    def __init__(self, app=None):
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("CATALOG_LISTENER_ENABLED", True)
+        app.config.setdefault("CATALOG_POLL_INTERVAL", 0.5)
+        app.config.setdefault("CATALOG_LISTEN_POLL_INTERVAL", 60.0)
+        app.config.setdefault("CATALOG_NOTIFY_CHANNEL", "catalog_version")
+
+        self.app = app
+        self.channel = app.config["CATALOG_NOTIFY_CHANNEL"]
+        self.poll_interval = app.config["CATALOG_POLL_INTERVAL"]
+        self.listen_poll_interval = app.config["CATALOG_LISTEN_POLL_INTERVAL"]
+        self._failures = 0
+
+        app.extensions["catalog_listener"] = self
+        if app.config["CATALOG_LISTENER_ENABLED"]:
+            app.before_request(self.start)
+
+    def start(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            threading.Thread(
+                target=self._run, name="catalog-listener", daemon=True
+            ).start()
+
+    def stop(self):
+        self._stop.set()
+        self._pid = None
+
+    def _run(self):
+        stop = self._stop
+        with self.app.app_context():
+            engine = self.app.extensions["sqlalchemy"].engine
+            while not stop.is_set():
+                try:
+                    if _listens(engine):
+                        self._listen(engine, stop)
+                    else:
+                        self._poll(engine)
+                        stop.wait(self.poll_interval)
+                except Exception:
+                    # Log the first failure of a streak only, and back off
+                    # exponentially until the database answers again.
+                    if not self._failures:
+                        self.app.logger.exception("Catalog listener failed, retrying")
+                    self._failures += 1
+                    backoff = max(self.poll_interval, 1.0) * 2 ** (self._failures - 1)
+                    stop.wait(min(backoff, MAX_BACKOFF))
+
+    def _poll(self, engine):
+        version = read_catalog_version(engine)
+        if self._failures:
+            self.app.logger.info(
+                "Catalog listener recovered after %d failures", self._failures
+            )
+            self._failures = 0
+        if version is not None:
+            observe_catalog_version(version)
+
+    def _listen(self, engine, stop):
+        # A dedicated connection, taken out of the pool for good.
+        raw = engine.raw_connection()
+        raw.detach()
+        conn = raw.driver_connection
+        try:
+            # A pre-ping may have left a transaction open.
+            conn.rollback()
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+
+            # Anything committed before LISTEN took effect is caught here.
+            self._poll(engine)
+            next_poll = time.monotonic() + self.listen_poll_interval
+            while not stop.is_set():
+                # Wake up every poll_interval to notice stop().
+                if not select.select([conn], [], [], self.poll_interval)[0]:
+                    if time.monotonic() >= next_poll:
+                        self._poll(engine)
+                        next_poll = time.monotonic() + self.listen_poll_interval
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    observe_catalog_version(int(conn.notifies.pop(0).payload))
+        finally:
+            raw.close()
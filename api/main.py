@@ -1,13 +1,24 @@
 import os
+from pathlib import Path
 
 from flask import Flask
 
-from api.extensions import db
+from api.db_routing import pool_options, replica_binds
+from api.embedded import is_sqlite_file, reader_url
+from api.extensions import (
+    catalog_listener,
+    compress,
+    db,
+    embedded_sqlite,
+    rate_limiter,
+)
 from api.routes.auth_routes import auth_bp
 from api.routes.book_routes import book_bp
 from api.routes.docs import docs_bp
 from api.routes.insights import api_bp as insights_bp
 
+BASE_DIR = Path(__file__).resolve().parent.parent
+
 
 def create_app():
     app = Flask(__name__)
@@ -20,6 +31,106 @@ def create_app():
 
     app.config["SQLALCHEMY_DATABASE_URI"] = database_url
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = pool_options("DB_")
+
+    # Optional read replicas: read-only repository methods are routed to
+    # them, writes always go to DATABASE_URL (see api/db_routing.py).
+    replica_urls = [
+        url.strip()
+        for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+        if url.strip()
+    ]
+
+    # Embedded mode for a local SQLite file (api/embedded.py): WAL, mmap and
+    # synchronous=NORMAL, with reads served by a pool of read-only
+    # connections to the same file, set up as one more replica.
+    app.config["SQLITE_EMBEDDED"] = os.getenv("SQLITE_EMBEDDED", "1") in (
+        "1",
+        "true",
+        "True",
+    )
+    app.config["SQLITE_MMAP_SIZE"] = int(
+        os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))
+    )
+    if app.config["SQLITE_EMBEDDED"] and is_sqlite_file(database_url):
+        replica_urls.append(reader_url(database_url))
+
+    app.config["SQLALCHEMY_BINDS"] = replica_binds(replica_urls)
+    # After an import, keep this process reading from the primary for a
+    # while so the new rows are visible even if replicas lag.
+    app.config["READ_YOUR_WRITES_SECONDS"] = float(
+        os.getenv("READ_YOUR_WRITES_SECONDS", "0")
+    )
+
+    # Scraped dataset shared by the scraper, the importer and the insights
+    # fallback. Resolved against the project root, not the working directory.
+    app.config["BOOKS_CSV_PATH"] = os.getenv(
+        "BOOKS_CSV_PATH", str(BASE_DIR / "data" / "books.csv")
+    )
+    app.config["INSIGHTS_CSV_FALLBACK"] = os.getenv("INSIGHTS_CSV_FALLBACK", "1") in (
+        "1",
+        "true",
+        "True",
+    )
+
+    # Cross-worker cache invalidation (api/invalidation.py): each process
+    # watches the catalog version via Postgres LISTEN/NOTIFY (re-reading it
+    # every CATALOG_LISTEN_POLL_INTERVAL seconds as a safety net), or polls
+    # it every CATALOG_POLL_INTERVAL seconds on SQLite.
+    app.config["CATALOG_LISTENER_ENABLED"] = os.getenv(
+        "CATALOG_LISTENER_ENABLED", "1"
+    ) in ("1", "true", "True")
+    app.config["CATALOG_POLL_INTERVAL"] = float(
+        os.getenv("CATALOG_POLL_INTERVAL", "0.5")
+    )
+    app.config["CATALOG_LISTEN_POLL_INTERVAL"] = float(
+        os.getenv("CATALOG_LISTEN_POLL_INTERVAL", "60")
+    )
+
+    # Rows per INSERT/UPDATE batch of an import, all in one transaction.
+    app.config["IMPORT_BATCH_SIZE"] = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+    # Rows fetched per round trip by the streaming export's server-side
+    # cursor; also the size of each encoded chunk.
+    app.config["EXPORT_BATCH_SIZE"] = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # OpenAPI spec, compiled to JSON once when the docs blueprint registers.
+    app.config["SWAGGER_SPEC_PATH"] = os.getenv(
+        "SWAGGER_SPEC_PATH", str(BASE_DIR / "docs" / "swagger.yaml")
+    )
+
+    # Response compression (api/compression.py); COMPRESS_CACHE_SIZE is the
+    # number of memoized compressed bodies kept per process.
+    app.config["COMPRESS_ENABLED"] = os.getenv("COMPRESS_ENABLED", "1") in (
+        "1",
+        "true",
+        "True",
+    )
+    app.config["COMPRESS_MIN_SIZE"] = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    app.config["COMPRESS_CACHE_SIZE"] = int(os.getenv("COMPRESS_CACHE_SIZE", "256"))
+
+    # Admission control (api/ratelimit.py): per-client token bucket plus a
+    # cap on in-flight expensive requests. Use a redis:// storage URL to
+    # share the limits between workers.
+    app.config["RATELIMIT_ENABLED"] = os.getenv("RATELIMIT_ENABLED", "1") in (
+        "1",
+        "true",
+        "True",
+    )
+    app.config["RATELIMIT_STORAGE_URL"] = os.getenv(
+        "RATELIMIT_STORAGE_URL", "memory://"
+    )
+    app.config["RATELIMIT_PER_SECOND"] = float(os.getenv("RATELIMIT_PER_SECOND", "10"))
+    app.config["RATELIMIT_BURST"] = float(os.getenv("RATELIMIT_BURST", "30"))
+    app.config["RATELIMIT_EXPENSIVE_COST"] = float(
+        os.getenv("RATELIMIT_EXPENSIVE_COST", "5")
+    )
+    app.config["RATELIMIT_MAX_INFLIGHT_EXPENSIVE"] = int(
+        os.getenv("RATELIMIT_MAX_INFLIGHT_EXPENSIVE", "8")
+    )
+    app.config["RATELIMIT_TRUST_FORWARDED_FOR"] = os.getenv(
+        "RATELIMIT_TRUST_FORWARDED_FOR", "0"
+    ) in ("1", "true", "True")
 
     # JWT config (can be overridden via env)
     app.config["JWT_SECRET_KEY"] = os.getenv(
@@ -29,6 +140,10 @@ def create_app():
     app.config["JWT_REFRESH_EXPIRES"] = int(os.getenv("JWT_REFRESH_EXPIRES", "86400"))
 
     db.init_app(app)
+    embedded_sqlite.init_app(app)
+    compress.init_app(app)
+    catalog_listener.init_app(app)
+    rate_limiter.init_app(app)
 
     # Register blueprints
     app.register_blueprint(book_bp)
@@ -1,5 +1,12 @@
+from datetime import datetime, timezone
+
 from api.main import db
 
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Book(db.Model):
     __tablename__ = 'books'
     id = db.Column(db.Integer, primary_key=True)
@@ -10,10 +17,37 @@ class Book(db.Model):
     category = db.Column(db.String(100), nullable=True)
     img_url = db.Column(db.Text, nullable=True)
     url = db.Column(db.String(500), nullable=False, unique=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    # Position in the change feed: taken from CatalogVersion on every insert
+    # and update, so rows changed later always have a higher version.
+    row_version = db.Column(db.BigInteger, nullable=False)
     
     def __repr__(self):
         return f'<Book {self.title}>'
+
+    def to_dict(self):
+        """Public JSON representation; prices are exposed in currency units."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "price": self.price / 100,
+            "currency": self.currency,
+            "rating": self.rating,
+            "category": self.category,
+            "img_url": self.img_url,
+            "url": self.url,
+        }
     
     __table_args__ = (
         db.Index('idx_title_category', 'title', 'category'),
+        # Back the insights aggregates: GROUP BY rating / top-rated filter,
+        # GROUP BY category with AVG(price) as an index-only scan, and
+        # price range scans. The (column, id) indexes also serve the sorted
+        # listings (?sort=), whose ties are broken by id.
+        db.Index('idx_books_rating_id', 'rating', 'id'),
+        db.Index('idx_books_category_price', 'category', 'price'),
+        db.Index('idx_books_price_id', 'price', 'id'),
+        db.Index('idx_books_title_id', 'title', 'id'),
+        db.Index('idx_books_row_version', 'row_version', unique=True),
     )
\ No newline at end of file
@@ -0,0 +1,16 @@
+from api.main import db
+
+
+class CatalogVersion(db.Model):
+    """
+    Single-row counter handing out Book.row_version values. Writers bump it
+    in their own transaction, which locks the row until they commit, so
+    versions become visible in increasing order.
+    """
+
+    __tablename__ = 'catalog_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CatalogVersion {self.version}>'
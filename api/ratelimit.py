@@ -0,0 +1,321 @@
+"""
+Admission control: a token bucket per client and a cap on concurrent
+expensive requests.
+
+Clients are identified by the `sub` of a valid bearer token, otherwise by
+IP address. Every request takes one token from its client's bucket
+(RATELIMIT_PER_SECOND refill, RATELIMIT_BURST capacity); views decorated
+with :func:`expensive` take RATELIMIT_EXPENSIVE_COST tokens and also need
+one of RATELIMIT_MAX_INFLIGHT_EXPENSIVE in-flight slots. An empty bucket
+answers 429 and a full set of slots 503, both with Retry-After.
+
+State lives in a :class:`RateLimitStore`: in memory per process by default,
+or in Redis (`RATELIMIT_STORAGE_URL=redis://...`) so the limits are shared
+by all workers.
+"""
+
+import math
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from typing import Optional
+
+from flask import current_app, g, jsonify, request
+from itsdangerous import BadData
+
+from api.auth import _decode
+
+EXEMPT = "exempt"
+EXPENSIVE = "expensive"
+
+Rejection = namedtuple("Rejection", ["status", "error", "retry_after"])
+
+
+def expensive(fn):
+    """
+    Mark a view as expensive: it costs more tokens and is subject to the
+    in-flight limit.
+    """
+    fn.rate_limit = EXPENSIVE
+    return fn
+
+
+def exempt(fn):
+    """
+    Never rate limit this view (health checks, docs).
+    """
+    fn.rate_limit = EXEMPT
+    return fn
+
+
+class RateLimitStore(ABC):
+    # True when calls do network I/O and must not run on an event loop.
+    blocking = False
+
+    @abstractmethod
+    def consume(self, key: str, rate: float, burst: float, cost: float) -> float:
+        """
+        Take `cost` tokens from the bucket `key`. Returns 0 when they were
+        taken, otherwise the seconds until they will be available.
+        """
+
+    @abstractmethod
+    def acquire(self, key: str, limit: int, ttl: float) -> Optional[str]:
+        """
+        Take one of `limit` slots; returns a slot id, or None when all are
+        in use. Slots not released after `ttl` seconds may be reclaimed.
+        """
+
+    @abstractmethod
+    def release(self, key: str, slot: str):
+        pass
+
+
+class MemoryStore(RateLimitStore):
+    """
+    Per-process store. With several workers each one enforces the limits
+    on its own share of the traffic.
+    """
+
+    def __init__(self, max_buckets: int = 10000):
+        self.max_buckets = max_buckets
+        self._buckets = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, burst, cost):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            wait = 0.0 if tokens >= cost else (cost - tokens) / rate
+            if not wait:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_buckets:
+                self._prune(now, rate, burst)
+        return wait
+
+    def _prune(self, now, rate, burst):
+        # Buckets that have refilled completely carry no state worth keeping.
+        idle = burst / rate
+        self._buckets = {
+            key: state for key, state in self._buckets.items() if now - state[1] < idle
+        }
+
+    def acquire(self, key, limit, ttl):
+        with self._lock:
+            count = self._inflight.get(key, 0)
+            if count >= limit:
+                return None
+            self._inflight[key] = count + 1
+        return key
+
+    def release(self, key, slot):
+        with self._lock:
+            self._inflight[key] = max(0, self._inflight.get(key, 0) - 1)
+
+
+# Token bucket and slot bookkeeping run as Lua scripts so they are atomic
+# across workers, and use the Redis clock so workers need not agree on time.
+_CONSUME_SCRIPT = """
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = t[1] + t[2] / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then tokens = tokens - cost else wait = (cost - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+_ACQUIRE_SCRIPT = """
+local limit, ttl = tonumber(ARGV[1]), tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = t[1] + t[2] / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - ttl)
+if redis.call('ZCARD', KEYS[1]) >= limit then return 0 end
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('EXPIRE', KEYS[1], math.ceil(ttl))
+return 1
+"""
+
+
+class RedisStore(RateLimitStore):
+    """
+    Store shared by every worker through Redis (needs the `redis` package).
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis
+
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self._consume = self.client.register_script(_CONSUME_SCRIPT)
+        self._acquire = self.client.register_script(_ACQUIRE_SCRIPT)
+
+    def consume(self, key, rate, burst, cost):
+        return float(self._consume(keys=[self.prefix + key], args=[rate, burst, cost]))
+
+    def acquire(self, key, limit, ttl):
+        slot = uuid.uuid4().hex
+        if self._acquire(keys=[self.prefix + key], args=[limit, ttl, slot]):
+            return slot
+        return None
+
+    def release(self, key, slot):
+        self.client.zrem(self.prefix + key, slot)
+
+
+def store_from_url(url: str) -> RateLimitStore:
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(url)
+    if url in ("", "memory://"):
+        return MemoryStore()
+    raise ValueError(f"Unsupported RATELIMIT_STORAGE_URL: {url}")
+
+
+class RateLimiter:
+    """
+    Flask extension enforcing the limits in before_request. The ASGI entry
+    point enforces them itself and switches the Flask hooks off.
+    """
+
+    INFLIGHT_KEY = "inflight:expensive"
+    # Slots of requests that died without releasing them are reclaimed
+    # after this many seconds (Redis store).
+    SLOT_TTL = 60
+
+    def __init__(self, app=None):
+        self.store = None
+        self.enforce_in_app = True
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("RATELIMIT_ENABLED", True)
+        app.config.setdefault("RATELIMIT_STORAGE_URL", "memory://")
+        app.config.setdefault("RATELIMIT_PER_SECOND", 10.0)
+        app.config.setdefault("RATELIMIT_BURST", 30.0)
+        app.config.setdefault("RATELIMIT_EXPENSIVE_COST", 5.0)
+        app.config.setdefault("RATELIMIT_MAX_INFLIGHT_EXPENSIVE", 8)
+        app.config.setdefault("RATELIMIT_BUSY_RETRY_AFTER", 1)
+        app.config.setdefault("RATELIMIT_TRUST_FORWARDED_FOR", False)
+
+        self.enabled = app.config["RATELIMIT_ENABLED"]
+        self.rate = app.config["RATELIMIT_PER_SECOND"]
+        self.burst = app.config["RATELIMIT_BURST"]
+        self.expensive_cost = min(app.config["RATELIMIT_EXPENSIVE_COST"], self.burst)
+        self.max_inflight = app.config["RATELIMIT_MAX_INFLIGHT_EXPENSIVE"]
+        self.busy_retry_after = app.config["RATELIMIT_BUSY_RETRY_AFTER"]
+        self.trust_forwarded_for = app.config["RATELIMIT_TRUST_FORWARDED_FOR"]
+        self.store = store_from_url(app.config["RATELIMIT_STORAGE_URL"])
+
+        app.extensions["ratelimit"] = self
+        if self.enabled:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+            app.teardown_request(self._teardown_request)
+
+    def policy(self, app, endpoint: Optional[str]) -> Optional[str]:
+        view = app.view_functions.get(endpoint) if endpoint else None
+        return getattr(view, "rate_limit", None)
+
+    def client_id(
+        self,
+        authorization: Optional[str],
+        remote_addr: Optional[str],
+        forwarded_for: Optional[str] = None,
+    ) -> str:
+        """
+        Bucket key of the caller; needs an app context to verify tokens.
+        """
+        token = ""
+        if authorization and authorization.startswith("Bearer "):
+            token = authorization[7:].strip()
+        if token:
+            try:
+                data = _decode(token, current_app.config.get("JWT_ACCESS_EXPIRES", 900))
+                if data.get("sub"):
+                    return f"user:{data['sub']}"
+            except BadData:
+                pass
+
+        if self.trust_forwarded_for and forwarded_for:
+            # The right-most entry was added by our own proxy.
+            remote_addr = forwarded_for.split(",")[-1].strip()
+        return f"ip:{remote_addr or 'unknown'}"
+
+    def admit(
+        self, policy: Optional[str], client: str
+    ) -> tuple[Optional[Rejection], Optional[str]]:
+        """
+        Charge `client` for a request. Returns a rejection, or the in-flight
+        slot to release once the request is done (None if not needed).
+        """
+        if policy == EXEMPT:
+            return None, None
+
+        cost = self.expensive_cost if policy == EXPENSIVE else 1
+        wait = self.store.consume(f"bucket:{client}", self.rate, self.burst, cost)
+        if wait:
+            return Rejection(429, "Rate limit exceeded", math.ceil(wait)), None
+
+        if policy != EXPENSIVE:
+            return None, None
+
+        slot = self.store.acquire(self.INFLIGHT_KEY, self.max_inflight, self.SLOT_TTL)
+        if slot is None:
+            return (
+                Rejection(503, "Server busy, retry later", self.busy_retry_after),
+                None,
+            )
+        return None, slot
+
+    def release(self, slot: Optional[str]):
+        if slot is not None:
+            self.store.release(self.INFLIGHT_KEY, slot)
+
+    def _before_request(self):
+        if not self.enforce_in_app:
+            return None
+
+        policy = self.policy(current_app, request.endpoint)
+        if policy == EXEMPT:
+            return None
+
+        client = self.client_id(
+            request.headers.get("Authorization"),
+            request.remote_addr,
+            request.headers.get("X-Forwarded-For"),
+        )
+        rejection, slot = self.admit(policy, client)
+        if rejection is not None:
+            response = jsonify({"error": rejection.error})
+            response.status_code = rejection.status
+            response.headers["Retry-After"] = str(rejection.retry_after)
+            return response
+        g.rate_limit_slot = slot
+        return None
+
+    def _after_request(self, response):
+        # A streamed body is sent after the request is torn down, so hold
+        # the slot until the server closes the response.
+        slot = g.pop("rate_limit_slot", None)
+        if slot is not None:
+            if response.is_streamed:
+                response.call_on_close(lambda: self.release(slot))
+            else:
+                g.rate_limit_slot = slot
+        return response
+
+    def _teardown_request(self, exc):
+        self.release(g.pop("rate_limit_slot", None))
@@ -0,0 +1,159 @@
+import math
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.models.book import Book
+from api.repositories.book_repository import (
+    cache_facets,
+    cached_facets,
+    collect_facets,
+    facets_cache_key,
+    facets_query,
+    price_range_filters,
+    search_filters,
+    sort_order,
+)
+
+
+class Page:
+    """
+    The subset of Flask-SQLAlchemy's Pagination the routes rely on.
+    """
+
+    def __init__(self, items: list, page: int, per_page: int, total: int):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def pages(self) -> int:
+        if self.total == 0:
+            return 0
+        return math.ceil(self.total / self.per_page)
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.pages
+
+
+class AsyncBookRepository:
+    """
+    Read-only counterpart of BookRepository for the ASGI app, running the
+    same queries on an AsyncSession.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _paginate(
+        self, filters: list, page: int, per_page: int, sort: Optional[str] = None
+    ) -> Page:
+        # Same clamping as Flask-SQLAlchemy's paginate(error_out=False).
+        page = max(page, 1)
+        per_page = 20 if per_page <= 0 else per_page
+
+        total = await self.session.scalar(
+            select(func.count()).select_from(Book).where(*filters)
+        )
+        result = await self.session.scalars(
+            select(Book)
+            .where(*filters)
+            .order_by(*sort_order(sort))
+            .limit(per_page)
+            .offset((page - 1) * per_page)
+        )
+        return Page(list(result), page, per_page, total)
+
+    async def get_all_paginated(
+        self, page: int, per_page: int = 25, sort: Optional[str] = None
+    ) -> Page:
+        return await self._paginate([], page, per_page, sort)
+
+    async def search(
+        self,
+        title: Optional[str] = None,
+        category: Optional[str] = None,
+        min_rating: Optional[float] = None,
+        max_price: Optional[float] = None,
+        page: int = 1,
+        per_page: int = 25,
+        sort: Optional[str] = None,
+    ) -> Page:
+        filters = search_filters(title, category, min_rating, max_price)
+        return await self._paginate(filters, page, per_page, sort)
+
+    async def search_facets(
+        self,
+        title: Optional[str] = None,
+        category: Optional[str] = None,
+        min_rating: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> dict:
+        key = facets_cache_key(title, category, min_rating, max_price)
+        facets = cached_facets(key)
+        if facets is None:
+            filters = search_filters(title, category, min_rating, max_price)
+            result = await self.session.execute(facets_query(filters))
+            facets = cache_facets(key, collect_facets(result.all()))
+        return facets
+
+    async def get_by_id(self, book_id: int) -> Optional[Book]:
+        return await self.session.get(Book, book_id)
+
+    async def list_categories(self) -> list[str]:
+        rows = await self.session.scalars(
+            select(Book.category).distinct().order_by(Book.category)
+        )
+        return [c for c in rows if c]
+
+    async def has_books(self) -> bool:
+        return await self.session.scalar(select(Book.id).limit(1)) is not None
+
+    async def count_and_average_price(self) -> tuple[int, Optional[float]]:
+        result = await self.session.execute(
+            select(func.count(Book.id), func.avg(Book.price))
+        )
+        total, avg_price = result.one()
+        return total, float(avg_price) if avg_price is not None else None
+
+    async def rating_distribution(self) -> dict[float, int]:
+        result = await self.session.execute(
+            select(Book.rating, func.count(Book.id))
+            .where(Book.rating.isnot(None))
+            .group_by(Book.rating)
+        )
+        return {rating: count for rating, count in result}
+
+    async def category_stats(self) -> dict[str, tuple[int, float]]:
+        result = await self.session.execute(
+            select(Book.category, func.count(Book.id), func.avg(Book.price))
+            .where(Book.category.isnot(None))
+            .group_by(Book.category)
+            .order_by(Book.category)
+        )
+        return {
+            category: (count, float(avg_price)) for category, count, avg_price in result
+        }
+
+    async def get_by_rating(self, rating: float) -> list[Book]:
+        result = await self.session.scalars(
+            select(Book).where(Book.rating == rating).order_by(Book.id)
+        )
+        return list(result)
+
+    async def get_by_price_range(
+        self, min_price: float, max_price: float
+    ) -> list[Book]:
+        result = await self.session.scalars(
+            select(Book)
+            .where(*price_range_filters(min_price, max_price))
+            .order_by(Book.price, Book.id)
+        )
+        return list(result)
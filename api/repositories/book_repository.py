@@ -1,16 +1,189 @@
 import logging
-from typing import Iterable, Optional, Set
+import time
+from typing import Iterable, Iterator, Optional, Set
 
-from sqlalchemy import text
+from flask import current_app
+from sqlalchemy import case, func, insert, select, text, update
 
+from api.cache import LRUCache, catalog_version, observe_catalog_version
+from api.db_routing import pin_primary, replica_read
 from api.extensions import db
-from api.models.book import Book
+from api.invalidation import publish_catalog_version
+from api.models.book import Book, utcnow
+from api.models.catalog_version import CatalogVersion
+
+
+def search_filters(
+    title: Optional[str] = None,
+    category: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> list:
+    """
+    WHERE clauses for a book search, shared with AsyncBookRepository.
+    """
+    filters = []
+
+    if title:
+        filters.append(Book.title.ilike(f"%{title}%"))
+
+    if category:
+        filters.append(Book.category.ilike(f"%{category}%"))
+
+    if min_rating is not None:
+        filters.append(Book.rating >= min_rating)
+
+    if max_price is not None:
+        # Convert price to cents for comparison
+        max_price_cents = int(max_price * 100)
+        filters.append(Book.price <= max_price_cents)
+
+    return filters
+
+
+# Accepted values of ?sort=, "-" meaning descending. Each column has an
+# index ending in id, so a sorted page is read straight from the index, and
+# id breaks ties so pages are stable between requests.
+SORT_COLUMNS = {"price": Book.price, "rating": Book.rating, "title": Book.title}
+SORT_CHOICES = [prefix + name for name in SORT_COLUMNS for prefix in ("", "-")]
+
+
+def sort_order(sort: Optional[str] = None) -> list:
+    """
+    ORDER BY clauses for a value of SORT_CHOICES; by id when None.
+    """
+    if not sort:
+        return [Book.id]
+    if sort not in SORT_CHOICES:
+        raise ValueError(f"Unsupported sort: {sort}")
+    if sort.startswith("-"):
+        return [SORT_COLUMNS[sort[1:]].desc(), Book.id.desc()]
+    return [SORT_COLUMNS[sort], Book.id]
+
+
+def price_range_filters(min_price: float, max_price: float) -> list:
+    """
+    Inclusive price bounds given in currency units rather than cents.
+    """
+    return [Book.price >= min_price * 100, Book.price <= max_price * 100]
+
+
+# Fields written by the CSV import.
+IMPORT_FIELDS = ["title", "price", "currency", "rating", "category", "img_url"]
+
+# Fields compared by the CSV import to detect changed books. Fast crawls
+# store the listing thumbnail as img_url and full crawls the product-page
+# cover, so comparing it would mark every book changed whenever the crawl
+# mode is switched. A new image is only written along with another change,
+# or when none was stored.
+CHANGE_FIELDS = [field for field in IMPORT_FIELDS if field != "img_url"]
+
+# Columns of the bulk export, in output order.
+EXPORT_FIELDS = [
+    "id",
+    "title",
+    "price",
+    "currency",
+    "rating",
+    "category",
+    "img_url",
+    "url",
+]
+
+# Facet buckets: whole stars, and price bands as (label, upper bound in
+# cents, exclusive); the last band is open-ended.
+RATING_BUCKETS = ["1", "2", "3", "4", "5"]
+PRICE_BANDS = [
+    ("0-10", 1000),
+    ("10-20", 2000),
+    ("20-30", 3000),
+    ("30-40", 4000),
+    ("40-50", 5000),
+    ("50+", None),
+]
+
+# Facet counts per normalized filter set, keyed by the catalog version.
+# Other workers learn about imports from their CatalogListener; entries
+# also expire after FACETS_MAX_AGE seconds in case it is disabled.
+FACETS_MAX_AGE = 60
+facets_cache = LRUCache(512)
+
+
+def facets_query(filters: list):
+    """
+    One grouped query counting the matching books per (category, rating
+    bucket, price band); :func:`collect_facets` folds the rows per facet.
+    """
+    rating = case(
+        *[(Book.rating >= int(bucket), bucket) for bucket in reversed(RATING_BUCKETS)],
+        else_="unrated",
+    )
+    band = case(
+        *[(Book.price < upper, label) for label, upper in PRICE_BANDS if upper],
+        else_=PRICE_BANDS[-1][0],
+    )
+    return (
+        select(Book.category, rating, band, func.count())
+        .where(*filters)
+        .group_by(Book.category, rating, band)
+    )
+
+
+def collect_facets(rows) -> dict:
+    facets = {
+        "category": {},
+        "rating": dict.fromkeys(RATING_BUCKETS, 0),
+        "price": {label: 0 for label, _ in PRICE_BANDS},
+    }
+    for category, rating, band, count in rows:
+        if category:
+            facets["category"][category] = facets["category"].get(category, 0) + count
+        facets["rating"][rating] = facets["rating"].get(rating, 0) + count
+        facets["price"][band] += count
+    return facets
+
+
+def facets_cache_key(
+    title: Optional[str] = None,
+    category: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> tuple:
+    """
+    Cache key of a filter set. Text filters match case-insensitively, so
+    they are folded; the price is compared in cents like the query does.
+    """
+    return (
+        catalog_version(),
+        title.lower() if title else None,
+        category.lower() if category else None,
+        float(min_rating) if min_rating is not None else None,
+        int(max_price * 100) if max_price is not None else None,
+    )
+
+
+def cached_facets(key: tuple) -> Optional[dict]:
+    entry = facets_cache.get(key)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return entry[1]
+
+
+def cache_facets(key: tuple, facets: dict) -> dict:
+    facets_cache.set(key, (time.monotonic() + FACETS_MAX_AGE, facets))
+    return facets
 
 
 class BookRepository:
-    def get_all_paginated(self, page: int, per_page: int = 25):
-        return Book.query.paginate(page=page, per_page=per_page, error_out=False)
+    @replica_read
+    def get_all_paginated(
+        self, page: int, per_page: int = 25, sort: Optional[str] = None
+    ):
+        return Book.query.order_by(*sort_order(sort)).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
 
+    @replica_read
     def search(
         self,
         title: Optional[str] = None,
@@ -19,39 +192,223 @@ class BookRepository:
         max_price: Optional[float] = None,
         page: int = 1,
         per_page: int = 25,
+        sort: Optional[str] = None,
     ):
-        query = Book.query
+        query = Book.query.filter(
+            *search_filters(title, category, min_rating, max_price)
+        ).order_by(*sort_order(sort))
+        return query.paginate(page=page, per_page=per_page, error_out=False)
 
-        if title:
-            query = query.filter(Book.title.ilike(f"%{title}%"))
+    @replica_read
+    def search_facets(
+        self,
+        title: Optional[str] = None,
+        category: Optional[str] = None,
+        min_rating: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> dict:
+        """
+        Counts of the books matching a search per category, rating bucket
+        and price band.
+        """
+        key = facets_cache_key(title, category, min_rating, max_price)
+        facets = cached_facets(key)
+        if facets is None:
+            filters = search_filters(title, category, min_rating, max_price)
+            rows = db.session.execute(facets_query(filters)).all()
+            facets = cache_facets(key, collect_facets(rows))
+        return facets
 
-        if category:
-            query = query.filter(Book.category.ilike(f"%{category}%"))
+    def get_existing_urls(self) -> Set[str]:
+        return {url for (url,) in db.session.query(Book.url).all()}
 
-        if min_rating is not None:
-            query = query.filter(Book.rating >= min_rating)
+    def get_existing_by_url(self) -> dict[str, tuple]:
+        """
+        (id, *IMPORT_FIELDS) of every stored book, by URL, to tell changed
+        rows from unchanged ones during an import.
+        """
+        columns = [getattr(Book, field) for field in IMPORT_FIELDS]
+        rows = db.session.query(Book.url, Book.id, *columns).all()
+        return {url: tuple(values) for url, *values in rows}
 
-        if max_price is not None:
-            # Convert price to cents for comparison
-            max_price_cents = int(max_price * 100)
-            query = query.filter(Book.price <= max_price_cents)
+    def bulk_insert(self, books: Iterable[Book]) -> None:
+        self.bulk_save(books, [])
 
-        return query.paginate(page=page, per_page=per_page, error_out=False)
+    def bulk_save(self, new_books: Iterable[Book], changes: list[dict]) -> None:
+        """
+        Insert `new_books` and apply `changes` (dicts with the `id` of the
+        book and the new field values) in one transaction, giving every
+        touched row a new row version. Rows are written IMPORT_BATCH_SIZE
+        at a time.
+        """
+        new_books = list(new_books)
+        if not new_books and not changes:
+            return
+        batch_size = current_app.config.get("IMPORT_BATCH_SIZE", 5000)
+        # Bulk executemany batches rather than a unit-of-work flush, which
+        # keeps the database write lock for much less time.
+        rows = [
+            {
+                "url": book.url,
+                **{field: getattr(book, field) for field in IMPORT_FIELDS},
+            }
+            for book in new_books
+        ]
 
-    def get_existing_urls(self) -> Set[str]:
-        return {url for (url,) in db.session.query(Book.url).all()}
+        version = self._reserve_versions(len(rows) + len(changes))
+        for row in rows:
+            row["row_version"] = version
+            version += 1
+        for start in range(0, len(rows), batch_size):
+            end = start + batch_size
+            db.session.execute(insert(Book), rows[start:end])
 
-    def bulk_insert(self, books: Iterable[Book]) -> None:
-        db.session.add_all(books)
+        if changes:
+            now = utcnow()
+            for change in changes:
+                change.update(row_version=version, updated_at=now)
+                version += 1
+            for start in range(0, len(changes), batch_size):
+                end = start + batch_size
+                db.session.execute(update(Book), changes[start:end])
+
+        latest = version - 1
+        publish_catalog_version(
+            db.session, latest, current_app.config["CATALOG_NOTIFY_CHANNEL"]
+        )
         db.session.commit()
+        observe_catalog_version(latest)
+        pin_primary(current_app.config.get("READ_YOUR_WRITES_SECONDS", 0))
+
+    def _reserve_versions(self, count: int) -> int:
+        """
+        Take `count` consecutive row versions; returns the first. The row
+        stays locked until the caller's transaction ends.
+        """
+        result = db.session.execute(
+            update(CatalogVersion)
+            .where(CatalogVersion.id == 1)
+            .values(version=CatalogVersion.version + count)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            # Tables created with create_all() rather than the migrations.
+            db.session.add(CatalogVersion(id=1, version=count))
+            db.session.flush()
+            return 1
+        latest = db.session.scalar(
+            select(CatalogVersion.version).where(CatalogVersion.id == 1)
+        )
+        return latest - count + 1
+
+    @replica_read
+    def changes_since(self, since: int, limit: int) -> list[Book]:
+        """
+        Books inserted or updated after row version `since`, oldest first.
+        """
+        return (
+            Book.query.filter(Book.row_version > since)
+            .order_by(Book.row_version)
+            .limit(limit)
+            .all()
+        )
+
+    def iter_export(self, batch_size: int = 1000) -> Iterator[list]:
+        """
+        Every book as rows of EXPORT_FIELDS in id order, in batches of
+        `batch_size` read from a server-side cursor. The query runs on the
+        first batch and keeps its connection until the iterator is exhausted
+        or closed, so a streamed response must iterate it inside the request
+        context (stream_with_context).
+        """
+        result = self._export_result(batch_size)
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
+
+    @replica_read
+    def _export_result(self, batch_size: int):
+        columns = [getattr(Book, field) for field in EXPORT_FIELDS]
+        return db.session.execute(
+            select(*columns).order_by(Book.id).execution_options(yield_per=batch_size)
+        )
 
+    @replica_read
     def get_by_id(self, book_id: int) -> Optional[Book]:
         return Book.query.get(book_id)
 
+    @replica_read
     def list_categories(self) -> list[str]:
         rows = db.session.query(Book.category).distinct().order_by(Book.category).all()
         return [c for (c,) in rows if c]
 
+    @replica_read
+    def list_titles(self) -> list[tuple[int, str, Optional[float]]]:
+        """
+        (id, title, rating) of every book, for the suggest index.
+        """
+        return [
+            tuple(row)
+            for row in db.session.query(Book.id, Book.title, Book.rating).all()
+        ]
+
+    @replica_read
+    def has_books(self) -> bool:
+        return db.session.query(Book.id).limit(1).first() is not None
+
+    @replica_read
+    def count_and_average_price(self) -> tuple[int, Optional[float]]:
+        """
+        Total number of books and their mean price in cents, in one query.
+        """
+        total, avg_price = db.session.query(
+            func.count(Book.id), func.avg(Book.price)
+        ).one()
+        return total, float(avg_price) if avg_price is not None else None
+
+    @replica_read
+    def rating_distribution(self) -> dict[float, int]:
+        rows = (
+            db.session.query(Book.rating, func.count(Book.id))
+            .filter(Book.rating.isnot(None))
+            .group_by(Book.rating)
+            .all()
+        )
+        return {rating: count for rating, count in rows}
+
+    @replica_read
+    def category_stats(self) -> dict[str, tuple[int, float]]:
+        """
+        Book count and mean price in cents per category.
+        """
+        rows = (
+            db.session.query(Book.category, func.count(Book.id), func.avg(Book.price))
+            .filter(Book.category.isnot(None))
+            .group_by(Book.category)
+            .order_by(Book.category)
+            .all()
+        )
+        return {
+            category: (count, float(avg_price)) for category, count, avg_price in rows
+        }
+
+    @replica_read
+    def get_by_rating(self, rating: float) -> list[Book]:
+        return Book.query.filter(Book.rating == rating).order_by(Book.id).all()
+
+    @replica_read
+    def get_by_price_range(self, min_price: float, max_price: float) -> list[Book]:
+        """
+        Books priced between `min_price` and `max_price` (inclusive, in
+        currency units rather than cents).
+        """
+        return (
+            Book.query.filter(*price_range_filters(min_price, max_price))
+            .order_by(Book.price, Book.id)
+            .all()
+        )
+
     def is_db_connected(self) -> bool:
         try:
             with db.engine.connect() as conn:
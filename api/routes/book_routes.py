@@ -1,40 +1,72 @@
+import os
 import threading
+from datetime import timezone
 from pathlib import Path
 
-from flask import Blueprint, current_app, jsonify, request
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
 
 from api.auth import jwt_required
-from api.repositories.book_repository import BookRepository
-from scripts.scraper import BookScraper
-from scripts.writer import CSVWriter
+from api.export import EXPORT_FORMATS
+from api.ratelimit import exempt, expensive
+from api.repositories.book_repository import SORT_CHOICES, BookRepository
+from api.suggest import MAX_LIMIT as SUGGEST_MAX_LIMIT
+from api.suggest import suggest_index
+from scripts.checkpoint import CrawlCheckpoint
 
 book_bp = Blueprint("books", __name__, url_prefix="/api/v1")
 
+CHANGES_DEFAULT_LIMIT = 500
+CHANGES_MAX_LIMIT = 1000
+
+
+def _crawl_checkpoint_dir(app) -> str:
+    """Crawl progress is kept next to the CSV it belongs to."""
+    return os.path.join(os.path.dirname(app.config["BOOKS_CSV_PATH"]), "crawl")
+
+
+def _change_record(book) -> dict:
+    return {
+        **book.to_dict(),
+        "row_version": book.row_version,
+        "created_at": book.created_at.replace(tzinfo=timezone.utc).isoformat(),
+        "updated_at": book.updated_at.replace(tzinfo=timezone.utc).isoformat(),
+    }
+
+
+def _sort_error(sort):
+    """400 response for an unsupported ?sort= value, None if it is valid."""
+    if not sort or sort in SORT_CHOICES:
+        return None
+    return (
+        jsonify({"error": f"Invalid sort, expected one of: {', '.join(SORT_CHOICES)}"}),
+        400,
+    )
+
 
 @book_bp.route("/books", methods=["GET"])
 def get_books():
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 25, type=int)
+    sort = request.args.get("sort", type=str)
+
+    error = _sort_error(sort)
+    if error:
+        return error
 
     repository = BookRepository()
-    pagination = repository.get_all_paginated(page, per_page)
+    pagination = repository.get_all_paginated(page, per_page, sort)
 
     return (
         jsonify(
             {
-                "books": [
-                    {
-                        "id": b.id,
-                        "title": b.title,
-                        "price": b.price / 100,
-                        "currency": b.currency,
-                        "rating": b.rating,
-                        "category": b.category,
-                        "img_url": b.img_url,
-                        "url": b.url,
-                    }
-                    for b in pagination.items
-                ],
+                "books": [b.to_dict() for b in pagination.items],
                 "meta": {
                     "page": pagination.page,
                     "per_page": pagination.per_page,
@@ -57,6 +89,8 @@ def search_books():
     max_price = request.args.get("max_price", type=float)
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 25, type=int)
+    sort = request.args.get("sort", type=str)
+    with_facets = request.args.get("facets", "false").lower() in ("1", "true")
 
     if not any([title, category, min_rating, max_price]):
         return (
@@ -68,6 +102,10 @@ def search_books():
             400,
         )
 
+    error = _sort_error(sort)
+    if error:
+        return error
+
     repository = BookRepository()
     pagination = repository.search(
         title=title,
@@ -76,31 +114,61 @@ def search_books():
         max_price=max_price,
         page=page,
         per_page=per_page,
+        sort=sort,
+    )
+    meta = {
+        "page": pagination.page,
+        "per_page": pagination.per_page,
+        "total_pages": pagination.pages,
+        "total_items": pagination.total,
+        "has_next": pagination.has_next,
+        "has_prev": pagination.has_prev,
+    }
+    if with_facets:
+        meta["facets"] = repository.search_facets(
+            title=title, category=category, min_rating=min_rating, max_price=max_price
+        )
+
+    return (
+        jsonify({"books": [b.to_dict() for b in pagination.items], "meta": meta}),
+        200,
     )
 
+
+@book_bp.route("/books/changes", methods=["GET"])
+def get_book_changes():
+    """
+    Change feed: books inserted or updated after row version `since`,
+    oldest first. Pass `meta.next_since` back until `has_more` is false.
+    """
+    try:
+        since = int(request.args.get("since", 0))
+        limit = int(request.args.get("limit", CHANGES_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers"}), 400
+    if since < 0 or not 1 <= limit <= CHANGES_MAX_LIMIT:
+        return (
+            jsonify(
+                {
+                    "error": f"since must be >= 0 and limit between 1 and {CHANGES_MAX_LIMIT}"
+                }
+            ),
+            400,
+        )
+
+    repository = BookRepository()
+    books = repository.changes_since(since, limit + 1)
+    has_more = len(books) > limit
+    books = books[:limit]
+
     return (
         jsonify(
             {
-                "books": [
-                    {
-                        "id": b.id,
-                        "title": b.title,
-                        "price": b.price / 100,
-                        "currency": b.currency,
-                        "rating": b.rating,
-                        "category": b.category,
-                        "img_url": b.img_url,
-                        "url": b.url,
-                    }
-                    for b in pagination.items
-                ],
+                "books": [_change_record(b) for b in books],
                 "meta": {
-                    "page": pagination.page,
-                    "per_page": pagination.per_page,
-                    "total_pages": pagination.pages,
-                    "total_items": pagination.total,
-                    "has_next": pagination.has_next,
-                    "has_prev": pagination.has_prev,
+                    "since": since,
+                    "next_since": books[-1].row_version if books else since,
+                    "has_more": has_more,
                 },
             }
         ),
@@ -108,6 +176,51 @@ def search_books():
     )
 
 
+@book_bp.route("/books/export", methods=["GET"])
+@expensive
+def export_books():
+    """
+    Stream the whole catalog as NDJSON or CSV, in id order.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return (
+            jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}),
+            400,
+        )
+    mimetype, extension, encode = EXPORT_FORMATS[fmt]
+
+    # A generator: the query runs once the response body is iterated, inside
+    # the request context that stream_with_context pushes again, so the
+    # session and its connection outlive the view.
+    repository = BookRepository()
+    batches = repository.iter_export(current_app.config.get("EXPORT_BATCH_SIZE", 1000))
+
+    return Response(
+        stream_with_context(encode(batches)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="books.{extension}"'},
+    )
+
+
+@book_bp.route("/books/suggest", methods=["GET"])
+def suggest_books():
+    """
+    Search-as-you-type: categories and the best rated books with a word
+    starting with `q`, from the in-memory prefix index.
+    """
+    query = request.args.get("q", "", type=str)
+    limit = request.args.get("limit", 10, type=int)
+    if not query.strip():
+        return jsonify({"error": "q is required"}), 400
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+
+    return (
+        jsonify(suggest_index.suggest(BookRepository(), query, limit)),
+        200,
+    )
+
+
 @book_bp.route("/books/<int:book_id>", methods=["GET"])
 def get_book(book_id: int):
     repository = BookRepository()
@@ -116,21 +229,7 @@ def get_book(book_id: int):
     if not b:
         return jsonify({"error": "Book not found"}), 404
 
-    return (
-        jsonify(
-            {
-                "id": b.id,
-                "title": b.title,
-                "price": b.price / 100,
-                "currency": b.currency,
-                "rating": b.rating,
-                "category": b.category,
-                "img_url": b.img_url,
-                "url": b.url,
-            }
-        ),
-        200,
-    )
+    return jsonify(b.to_dict()), 200
 
 
 @book_bp.route("/categories", methods=["GET"])
@@ -141,6 +240,7 @@ def get_categories():
 
 
 @book_bp.route("/health", methods=["GET"])
+@exempt
 def health():
     repository = BookRepository()
     db_ok = repository.is_db_connected()
@@ -166,7 +266,14 @@ scraping_in_progress = False
 def trigger_scraping():
     """Start the scraping pipeline in a background thread. Returns 202 if started,
     409 if a scraping job is already running.
+
+    Post `{"fast": true}` to scrape from listing pages only (see
+    BookScraper.save_books_fast). If a previous run of the same mode failed
+    part way, the crawl resumes from its checkpoint and appends to the CSV.
     """
+    options = request.get_json(silent=True) or {}
+    fast = bool(options.get("fast", False))
+
     if not scraping_lock.acquire(blocking=False):
         return (
             jsonify({"status": "busy", "message": "Scraping already in progress"}),
@@ -175,12 +282,19 @@ def trigger_scraping():
 
     # capture app for logging inside background thread
     app = current_app._get_current_object()
+    csv_path = app.config["BOOKS_CSV_PATH"]
+    checkpoint_dir = _crawl_checkpoint_dir(app)
 
     def worker(app=app):
         global scraping_in_progress
         try:
             scraping_in_progress = True
 
+            # Imported on first use: requests and BeautifulSoup are only
+            # needed by admins running a crawl, not by every API worker.
+            from scripts.scraper import BookScraper
+            from scripts.writer import CSVWriter
+
             fieldnames = [
                 "title",
                 "price",
@@ -191,13 +305,27 @@ def trigger_scraping():
                 "url",
             ]
 
+            checkpoint = CrawlCheckpoint.load(checkpoint_dir)
+            # Rows of an interrupted run live in the unpublished .partial file;
+            # without it there is nothing to append to, so start over.
+            resuming = checkpoint.can_resume(
+                "fast" if fast else "full"
+            ) and CSVWriter.has_partial(csv_path)
+            if resuming:
+                app.logger.info("Resuming crawl: %s", checkpoint.progress())
+            else:
+                checkpoint.reset()
+
             try:
-                with CSVWriter("./data/books.csv", fieldnames) as writer:
+                with CSVWriter(csv_path, fieldnames, append=resuming) as writer:
                     writer.save_header()
-                    scraper = BookScraper(storage=writer)
-                    scraper.run()
+                    scraper = BookScraper(storage=writer, checkpoint=checkpoint)
+                    scraper.run(fast=fast)
             except Exception:
-                app.logger.exception("Scraper execution failed")
+                app.logger.exception(
+                    "Scraper execution failed; progress kept in %s",
+                    checkpoint_dir,
+                )
 
         finally:
             scraping_in_progress = False
@@ -209,7 +337,7 @@ def trigger_scraping():
     th = threading.Thread(target=worker, daemon=True)
     th.start()
 
-    return jsonify({"status": "started"}), 202
+    return jsonify({"status": "started", "mode": "fast" if fast else "full"}), 202
 
 
 @book_bp.route("/scraping/trigger/status", methods=["GET"])
@@ -221,6 +349,9 @@ def scraping_trigger_status():
             {
                 "running": bool(scraping_in_progress),
                 "locked": scraping_lock.locked(),
+                "checkpoint": CrawlCheckpoint.load(
+                    _crawl_checkpoint_dir(current_app)
+                ).progress(),
             }
         ),
         200,
@@ -252,7 +383,7 @@ def trigger_import():
     """Import existing CSV data into the database in a background thread.
     Returns 202 if import started, 409 if import already running, or 400 if CSV missing.
     """
-    CSV_PATH = Path("/app/data/books.csv")
+    CSV_PATH = Path(current_app.config["BOOKS_CSV_PATH"])
 
     if not CSV_PATH.exists():
         return (
@@ -282,8 +413,9 @@ def trigger_import():
 
                 result = service.import_from_csv(CSV_PATH)
                 app.logger.info(
-                    "Import finished: inserted=%s skipped=%s",
+                    "Import finished: inserted=%s updated=%s skipped=%s",
                     result["inserted"],
+                    result["updated"],
                     result["skipped"],
                 )
         except Exception:
@@ -1,18 +1,41 @@
 import yaml
-from flask import Blueprint, Response, jsonify
+from flask import Blueprint, Response, current_app, jsonify
+
+from api.ratelimit import exempt
 
 docs_bp = Blueprint("docs", __name__)
 
 
+@docs_bp.record_once
+def compile_spec(state):
+    """
+    Parse the YAML spec once when the blueprint is registered and keep the
+    serialized JSON, instead of re-reading the file on every request.
+    """
+    app = state.app
+    spec_path = app.config["SWAGGER_SPEC_PATH"]
+    try:
+        with open(spec_path, "r", encoding="utf-8") as fh:
+            spec = yaml.safe_load(fh)
+    except (OSError, yaml.YAMLError):
+        app.logger.exception("Could not load API spec from %s", spec_path)
+        spec_json = None
+    else:
+        spec_json = app.json.response(spec).get_data()
+    app.extensions["swagger_json"] = spec_json
+
+
 @docs_bp.route("/swagger.json", methods=["GET"])
+@exempt
 def swagger_json():
-    spec_path = "/app/docs/swagger.yaml"
-    with open(spec_path, "r", encoding="utf-8") as fh:
-        spec = yaml.safe_load(fh)
-    return jsonify(spec)
+    spec_json = current_app.extensions.get("swagger_json")
+    if spec_json is None:
+        return jsonify({"error": "API spec not found"}), 404
+    return Response(spec_json, mimetype="application/json")
 
 
 @docs_bp.route("/docs", methods=["GET"])
+@exempt
 def swagger_ui():
     # Minimal Swagger UI page using CDN
     html = """
@@ -1,22 +1,99 @@
-from flask import Blueprint, jsonify, request
-import pandas as pd
+import threading
+
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy.exc import SQLAlchemyError
+
+from api.ratelimit import expensive
+from api.repositories.book_repository import BookRepository
+from scripts.snapshots import snapshot_identity
 
 api_bp = Blueprint('insights_api', __name__)
-CSV_PATH = './data/books.csv'
+
+# Stats are aggregated in the database. The scraped CSV is only read (with
+# pandas) when the books table is empty or unreachable and the fallback is
+# enabled, e.g. right after a scrape that has not been imported yet.
+
+# The CSV is only ever replaced by an atomic rename, so a parsed frame stays
+# valid for as long as the published file keeps the same identity.
+_cache_lock = threading.Lock()
+_cache = {"identity": None, "df": None}
 
 def load_data():
-    try:        
-        df = pd.read_csv(CSV_PATH)  
+    if not current_app.config.get("INSIGHTS_CSV_FALLBACK", True):
+        return None
+
+    csv_path = current_app.config["BOOKS_CSV_PATH"]
+    identity = snapshot_identity(csv_path)
+    if identity is None:
+        return None
+
+    with _cache_lock:
+        if _cache["identity"] == identity:
+            return _cache["df"]
+
+    try:
+        import pandas as pd
+
+        df = pd.read_csv(csv_path)
         df['price_decimal'] = df['price'] / 100
-        return df
     except Exception:
+        current_app.logger.exception("Could not load insights fallback CSV")
         return None
 
+    with _cache_lock:
+        _cache["identity"] = identity
+        _cache["df"] = df
+    return df
+
+def _use_fallback(repository, result_empty: bool) -> bool:
+    """
+    True when the database cannot answer: it is unreachable, or the result
+    is empty because no books have been imported at all.
+    """
+    if not result_empty:
+        return False
+    try:
+        return not repository.has_books()
+    except SQLAlchemyError:
+        return True
+
+def _rating_key(rating):
+    # Whole-star ratings are keyed as "5" rather than "5.0", as the CSV gave them.
+    return int(rating) if float(rating).is_integer() else rating
+
+def _book_record(b):
+    return {
+        "id": b.id,
+        "title": b.title,
+        "price": b.price,
+        "price_decimal": b.price / 100,
+        "currency": b.currency,
+        "rating": b.rating,
+        "category": b.category,
+        "img_url": b.img_url,
+        "url": b.url,
+    }
+
 @api_bp.route('/api/v1/stats/overview', methods=['GET'])
 def get_stats_overview():
+    repository = BookRepository()
+    try:
+        total, avg_price = repository.count_and_average_price()
+        distribution = repository.rating_distribution() if total else {}
+    except SQLAlchemyError:
+        current_app.logger.exception("Overview query failed")
+        total = 0
+
+    if total:
+        return jsonify({
+            "total_books": total,
+            "average_price": round(avg_price / 100, 2),
+            "rating_distribution": {_rating_key(r): c for r, c in distribution.items()}
+        })
+
     df = load_data()
     if df is None: return jsonify({"error": "Data not found"}), 404
-    
+
     stats = {
         "total_books": len(df),
         "average_price": round(df['price_decimal'].mean(), 2),
@@ -26,34 +103,72 @@ def get_stats_overview():
 
 @api_bp.route('/api/v1/stats/categories', methods=['GET'])
 def get_stats_categories():
+    repository = BookRepository()
+    try:
+        rows = repository.category_stats()
+        fallback = _use_fallback(repository, not rows)
+    except SQLAlchemyError:
+        current_app.logger.exception("Category stats query failed")
+        fallback = True
+
+    if not fallback:
+        return jsonify({
+            category: {"count": count, "avg_price": round(avg_price / 100, 2)}
+            for category, (count, avg_price) in rows.items()
+        })
+
     df = load_data()
     if df is None: return jsonify({"error": "Data not found"}), 404
-    
+
     cat_stats = df.groupby('category').agg(
         count=('title', 'count'),
         avg_price=('price_decimal', 'mean')
     ).round(2).to_dict(orient='index')
-    
+
     return jsonify(cat_stats)
 
 @api_bp.route('/api/v1/books/top-rated', methods=['GET'])
+@expensive
 def get_top_rated():
+    repository = BookRepository()
+    try:
+        books = repository.get_by_rating(5)
+        fallback = _use_fallback(repository, not books)
+    except SQLAlchemyError:
+        current_app.logger.exception("Top-rated query failed")
+        fallback = True
+
+    if not fallback:
+        return jsonify([_book_record(b) for b in books])
+
     df = load_data()
     if df is None: return jsonify({"error": "Data not found"}), 404
-    
+
     top_books = df[df['rating'] == 5]
     return jsonify(top_books.to_dict(orient='records'))
 
 @api_bp.route('/api/v1/books/price-range', methods=['GET'])
+@expensive
 def get_price_range():
-    df = load_data()
-    if df is None: return jsonify({"error": "Data not found"}), 404
-    
     min_p = request.args.get('min', type=float)
     max_p = request.args.get('max', type=float)
-    
+
     if min_p is None or max_p is None:
         return jsonify({"error": "Provide min and max price"}), 400
-        
+
+    repository = BookRepository()
+    try:
+        books = repository.get_by_price_range(min_p, max_p)
+        fallback = _use_fallback(repository, not books)
+    except SQLAlchemyError:
+        current_app.logger.exception("Price range query failed")
+        fallback = True
+
+    if not fallback:
+        return jsonify([_book_record(b) for b in books])
+
+    df = load_data()
+    if df is None: return jsonify({"error": "Data not found"}), 404
+
     filtered = df[(df['price_decimal'] >= min_p) & (df['price_decimal'] <= max_p)]
     return jsonify(filtered.to_dict(orient='records'))
@@ -3,7 +3,11 @@ from pathlib import Path
 from typing import List
 
 from api.models.book import Book
-from api.repositories.book_repository import BookRepository
+from api.repositories.book_repository import (
+    CHANGE_FIELDS,
+    IMPORT_FIELDS,
+    BookRepository,
+)
 
 
 class BookImportService:
@@ -12,18 +16,36 @@ class BookImportService:
 
     def import_from_csv(self, csv_path: str | Path) -> dict:
         books = self._load_csv(csv_path)
-        existing_urls = self.repository.get_existing_urls()
+        existing = self.repository.get_existing_by_url()
 
-        to_insert = [
-            book for book in books
-            if book.url not in existing_urls
-        ]
+        # A resumed crawl may have appended a row twice, so also dedupe
+        # within the file itself.
+        seen = set()
+        to_insert = []
+        to_update = []
+        for book in books:
+            if book.url in seen:
+                continue
+            seen.add(book.url)
 
-        self.repository.bulk_insert(to_insert)
+            stored = existing.get(book.url)
+            if stored is None:
+                to_insert.append(book)
+                continue
+
+            values = {field: getattr(book, field) for field in IMPORT_FIELDS}
+            current = dict(zip(IMPORT_FIELDS, stored[1:]))
+            if any(values[field] != current[field] for field in CHANGE_FIELDS) or (
+                values["img_url"] and not current["img_url"]
+            ):
+                to_update.append({"id": stored[0], **values})
+
+        self.repository.bulk_save(to_insert, to_update)
 
         return {
             "inserted": len(to_insert),
-            "skipped": len(books) - len(to_insert)
+            "updated": len(to_update),
+            "skipped": len(books) - len(to_insert) - len(to_update),
         }
 
     def _load_csv(self, csv_path: str | Path) -> List[Book]:
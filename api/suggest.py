@@ -0,0 +1,162 @@
+"""
+In-memory prefix index behind /books/suggest.
+
+Titles and categories are normalized (case and accents folded, spacing
+collapsed) and every word-start suffix is stored in a sorted array, so a
+query is a bisect plus picking the best-ranked entries of the matching
+slice. The best entries of heavily shared prefixes are worked out once at
+build time. The index is rebuilt from the database on first use and, in
+the background, whenever a new catalog version is observed: when the
+CatalogListener starts in a worker and after every import, here or in
+another process.
+"""
+
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from flask import current_app, has_app_context
+
+from api.cache import catalog_version, on_catalog_change
+from api.repositories.book_repository import BookRepository
+
+# Prefixes matching more keys than this get their top entries precomputed,
+# so no query has to rank more than this many.
+HEAVY_RANGE = 256
+MAX_LIMIT = 20
+
+
+def normalize(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(folded.split())
+
+
+class PrefixIndex:
+    """
+    Prefix search over `texts`, which are given best first; results are
+    positions in that list (ranks), best first.
+    """
+
+    def __init__(self, texts: list[str], top_k: int = MAX_LIMIT):
+        pairs = []
+        for rank, text in enumerate(texts):
+            words = normalize(text).split(" ")
+            for i in range(len(words)):
+                pairs.append((" ".join(words[i:]), rank))
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.ranks = [rank for _, rank in pairs]
+        self.top_k = top_k
+        self._top = self._precompute()
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def _best(self, lo: int, hi: int, limit: int) -> list[int]:
+        return heapq.nsmallest(limit, set(self.ranks[lo:hi]))
+
+    def _precompute(self) -> dict[str, list[int]]:
+        # Walk the prefixes shared by more than HEAVY_RANGE keys, one more
+        # character at a time; every other prefix has a small slice.
+        top = {}
+        stack = [""]
+        while stack:
+            parent = stack.pop()
+            lo, hi = self._range(parent)
+            i = lo
+            while i < hi:
+                if len(self.keys[i]) == len(parent):
+                    i += 1
+                    continue
+                prefix = self.keys[i][: len(parent) + 1]
+                end = bisect_left(self.keys, prefix + "\U0010ffff", i, hi)
+                if end - i > HEAVY_RANGE:
+                    top[prefix] = self._best(i, end, self.top_k)
+                    stack.append(prefix)
+                i = end
+        return top
+
+    def search(self, prefix: str, limit: int) -> list[int]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        if prefix in self._top:
+            return self._top[prefix][:limit]
+        return self._best(*self._range(prefix), limit)
+
+
+class SuggestIndex:
+    """
+    The current titles and categories index. Requests only build it when
+    there is none yet; after that it is rebuilt off the request path when
+    the catalog version moves, and requests keep using the previous index
+    until the new one is ready.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _build(self, repository) -> tuple:
+        version = catalog_version()
+        # Best first: highest rating, then title.
+        books = sorted(
+            repository.list_titles(),
+            key=lambda row: (-(row[2] or 0), row[1].casefold(), row[0]),
+        )
+        categories = repository.list_categories()
+        return (
+            version,
+            books,
+            PrefixIndex([title for _, title, _ in books]),
+            categories,
+            PrefixIndex(categories),
+        )
+
+    def snapshot(self, repository) -> tuple:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        return self.refresh(repository)
+
+    def refresh(self, repository) -> tuple:
+        """
+        Rebuild the index unless it is already at the current catalog
+        version.
+        """
+        with self._lock:
+            if self._snapshot is None or self._snapshot[0] != catalog_version():
+                self._snapshot = self._build(repository)
+            return self._snapshot
+
+    def suggest(self, repository, query: str, limit: int) -> dict:
+        _, books, book_index, categories, category_index = self.snapshot(repository)
+        return {
+            "categories": [categories[r] for r in category_index.search(query, limit)],
+            "books": [
+                {"id": book_id, "title": title, "rating": rating}
+                for book_id, title, rating in (
+                    books[r] for r in book_index.search(query, limit)
+                )
+            ],
+        }
+
+
+suggest_index = SuggestIndex()
+
+
+def _rebuild(app):
+    with app.app_context():
+        suggest_index.refresh(BookRepository())
+
+
+@on_catalog_change
+def _rebuild_in_background():
+    # Neither the import nor the listener should wait for the build.
+    if has_app_context():
+        app = current_app._get_current_object()
+        threading.Thread(target=_rebuild, args=(app,), daemon=True).start()
@@ -0,0 +1,246 @@
+"""
+Synthetic catalog generation and database seeding for the benchmark suite.
+
+The generated books mimic the shape of books.toscrape.com: a long-tailed
+category distribution, log-normally distributed prices and ratings skewed
+towards the upper stars.
+"""
+
+import argparse
+import math
+import os
+import random
+from pathlib import Path
+from typing import Iterator
+
+CATALOG_SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+FIELDNAMES = ["title", "price", "currency", "rating", "category", "img_url", "url"]
+
+CATEGORIES = [
+    "Default",
+    "Nonfiction",
+    "Sequential Art",
+    "Add a comment",
+    "Fiction",
+    "Young Adult",
+    "Fantasy",
+    "Romance",
+    "Mystery",
+    "Food and Drink",
+    "Childrens",
+    "Historical Fiction",
+    "Classics",
+    "Poetry",
+    "History",
+    "Womens Fiction",
+    "Horror",
+    "Science Fiction",
+    "Science",
+    "Music",
+    "Business",
+    "Thriller",
+    "Philosophy",
+    "Humor",
+    "Autobiography",
+    "Art",
+    "Psychology",
+    "Religion",
+    "Spirituality",
+    "New Adult",
+    "Self Help",
+    "Sports and Games",
+    "Biography",
+    "Christian Fiction",
+    "Travel",
+    "Health",
+    "Politics",
+    "Contemporary",
+    "Historical",
+    "Short Stories",
+    "Suspense",
+    "Christian",
+    "Novels",
+    "Paranormal",
+    "Cultural",
+    "Parenting",
+    "Adult Fiction",
+    "Crime",
+    "Academic",
+    "Erotica",
+]
+
+TITLE_WORDS = [
+    "light",
+    "attic",
+    "velvet",
+    "soumission",
+    "sharp",
+    "objects",
+    "sapiens",
+    "requiem",
+    "dirty",
+    "coming",
+    "boys",
+    "black",
+    "maria",
+    "starving",
+    "hearts",
+    "shakespeare",
+    "sonnets",
+    "set",
+    "me",
+    "free",
+    "rip",
+    "tide",
+    "secret",
+    "garden",
+    "river",
+    "winter",
+    "midnight",
+    "orchard",
+    "silent",
+    "empire",
+    "stone",
+    "kingdom",
+    "shadow",
+    "glass",
+    "ocean",
+    "wild",
+    "paper",
+    "house",
+    "golden",
+    "fire",
+]
+
+RATING_WEIGHTS = [0.14, 0.17, 0.2, 0.22, 0.27]
+
+
+def parse_size(value: str) -> int:
+    """
+    Accept either a named size (10k, 100k, 1m) or a plain integer.
+    """
+    key = value.strip().lower()
+    if key in CATALOG_SIZES:
+        return CATALOG_SIZES[key]
+    return int(key)
+
+
+def generate_books(size: int, seed: int = 42) -> Iterator[dict]:
+    """
+    Yield `size` synthetic book rows shaped like the scraper output.
+
+    Prices are in integer cents, exactly as CSVWriter stores them.
+    """
+    rng = random.Random(seed)
+
+    # Zipf-like weights give a handful of large categories and a long tail.
+    category_weights = [
+        1 / math.pow(rank, 1.1) for rank in range(1, len(CATEGORIES) + 1)
+    ]
+
+    for i in range(1, size + 1):
+        words = rng.choices(TITLE_WORDS, k=rng.randint(1, 5))
+        title = " ".join(words).title() + f" Vol. {i}"
+
+        price = min(max(rng.lognormvariate(3.3, 0.45), 5.0), 120.0)
+        slug = "-".join(words) + f"_{i}"
+
+        yield {
+            "title": title,
+            "price": int(round(price * 100)),
+            "currency": "GBP",
+            "rating": rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0],
+            "category": rng.choices(CATEGORIES, weights=category_weights)[0],
+            "img_url": f"https://books.toscrape.com/media/cache/{i % 256:02x}/{(i // 256) % 256:02x}/{slug}.jpg",
+            "url": f"https://books.toscrape.com/catalogue/{slug}/index.html",
+        }
+
+
+def write_csv(path: str | Path, size: int, seed: int = 42) -> None:
+    from scripts.writer import CSVWriter
+
+    with CSVWriter(str(path), FIELDNAMES) as writer:
+        writer.save_header()
+        for row in generate_books(size, seed):
+            writer.save_item(row)
+
+
+def seed_database(
+    database_url: str, size: int, seed: int = 42, chunk_size: int = 10_000
+) -> int:
+    """
+    Drop and recreate the books table on `database_url` and fill it with a
+    synthetic catalog. Returns the number of rows inserted.
+    """
+    os.environ["DATABASE_URL"] = database_url
+
+    from sqlalchemy import insert
+
+    from api.extensions import db
+    from api.main import create_app
+    from api.models.book import Book
+    from api.models.catalog_version import CatalogVersion
+
+    app = create_app()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        chunk: list[dict] = []
+        inserted = 0
+        for row in generate_books(size, seed):
+            chunk.append({**row, "row_version": inserted + len(chunk) + 1})
+            if len(chunk) >= chunk_size:
+                db.session.execute(insert(Book), chunk)
+                inserted += len(chunk)
+                chunk = []
+                print(f"Seeded {inserted}/{size} books")
+
+        if chunk:
+            db.session.execute(insert(Book), chunk)
+            inserted += len(chunk)
+
+        db.session.add(CatalogVersion(id=1, version=inserted))
+        db.session.commit()
+
+    print(f"Seeded {inserted} books into {database_url.split(':', 1)[0]}")
+    return inserted
+
+
+def count_books(database_url: str) -> int:
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT COUNT(*) FROM books")).scalar_one()
+    except Exception:
+        return 0
+    finally:
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate and seed a synthetic book catalog"
+    )
+    parser.add_argument("--size", default="10k", help="10k, 100k, 1m or an integer")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="Database to seed (SQLite or Postgres)")
+    parser.add_argument("--csv", help="Also write the catalog as a scraper-style CSV")
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+
+    if args.database_url:
+        seed_database(args.database_url, size, args.seed)
+    if args.csv:
+        write_csv(args.csv, size, args.seed)
+    if not args.database_url and not args.csv:
+        parser.error("Provide --database-url and/or --csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare benchmarks/results/10k-abc123.json benchmarks/results/10k-def456.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _load(path: str) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _change(old: float, new: float) -> float:
+    if not old:
+        return 0.0
+    return (new - old) / old * 100
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list[str]:
+    """
+    Print a side by side table and return the names of endpoints whose
+    throughput dropped or p99 grew by more than `threshold` percent.
+    """
+    regressions = []
+    print(f"{'endpoint':<20} {'req/s':<23} {'p50 ms':<23} {'p99 ms':<23}")
+
+    for name, new in candidate["endpoints"].items():
+        old = baseline["endpoints"].get(name)
+        if old is None:
+            print(f"{name:<20} (new)")
+            continue
+
+        rps = _change(old["throughput_rps"], new["throughput_rps"])
+        p50 = _change(old["latency_ms"]["p50"], new["latency_ms"]["p50"])
+        p99 = _change(old["latency_ms"]["p99"], new["latency_ms"]["p99"])
+
+        print(
+            f"{name:<20} "
+            f"{old['throughput_rps']:>9} -> {new['throughput_rps']:<9} "
+            f"{old['latency_ms']['p50']:>9} -> {new['latency_ms']['p50']:<9} "
+            f"{old['latency_ms']['p99']:>9} -> {new['latency_ms']['p99']:<9} "
+            f"({rps:+.1f}% rps, {p50:+.1f}% p50, {p99:+.1f}% p99)"
+        )
+
+        if rps < -threshold or p99 > threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percent change in throughput or p99 treated as a regression",
+    )
+    args = parser.parse_args()
+
+    baseline = _load(args.baseline)
+    candidate = _load(args.candidate)
+    print(f"baseline {baseline['commit']}  vs  candidate {candidate['commit']}")
+
+    regressions = compare(baseline, candidate, args.threshold)
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Bulk export throughput benchmark.
+
+Seeds (or reuses) a synthetic catalog, starts the API and downloads the
+whole catalog through /books/export in each format, reporting rows/s,
+MB/s, time to first byte and the peak RSS of the server workers. For
+comparison it also pages through /books the way clients did before the
+export existed.
+
+    python -m benchmarks.export --size 100k --rounds 3
+"""
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+import requests
+
+from benchmarks.catalog import parse_size
+from benchmarks.http_load import (
+    RESULTS_DIR,
+    git_revision,
+    prepare_catalog,
+    start_server,
+)
+
+
+def download_export(base_url: str, fmt: str) -> dict:
+    """
+    Stream one export and count its rows without keeping the body.
+    """
+    rows = size = 0
+    start = time.perf_counter()
+    first_byte = None
+    with requests.get(
+        f"{base_url}/api/v1/books/export",
+        params={"format": fmt},
+        stream=True,
+        timeout=600,
+    ) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            size += len(chunk)
+            rows += chunk.count(b"\n")
+    elapsed = time.perf_counter() - start
+
+    if fmt == "csv":
+        rows -= 1  # header
+    return {
+        "rows": rows,
+        "bytes": size,
+        "seconds": elapsed,
+        "ttfb_ms": ((first_byte or start) - start) * 1000,
+    }
+
+
+def download_paged(base_url: str, per_page: int) -> dict:
+    """
+    Fetch the catalog page by page from /books.
+    """
+    session = requests.Session()
+    rows = size = 0
+    page = 1
+    start = time.perf_counter()
+    first_byte = None
+    while True:
+        response = session.get(
+            f"{base_url}/api/v1/books",
+            params={"page": page, "per_page": per_page},
+            timeout=60,
+        )
+        response.raise_for_status()
+        if first_byte is None:
+            first_byte = time.perf_counter()
+        size += len(response.content)
+        data = response.json()
+        rows += len(data["books"])
+        if not data["meta"]["has_next"]:
+            break
+        page += 1
+    return {
+        "rows": rows,
+        "bytes": size,
+        "seconds": time.perf_counter() - start,
+        "ttfb_ms": (first_byte - start) * 1000,
+    }
+
+
+def server_peak_rss_mb(pid: int) -> float | None:
+    """
+    Highest peak RSS among the server process and its workers (Linux only).
+    """
+    pids = [pid]
+    try:
+        for task in Path(f"/proc/{pid}/task").iterdir():
+            pids += [int(p) for p in (task / "children").read_text().split()]
+        peaks = []
+        for p in pids:
+            for line in Path(f"/proc/{p}/status").read_text().splitlines():
+                if line.startswith("VmHWM:"):
+                    peaks.append(int(line.split()[1]))
+    except OSError:
+        return None
+    return round(max(peaks) / 1024, 1) if peaks else None
+
+
+def summarise(runs: list[dict]) -> dict:
+    seconds = statistics.median(run["seconds"] for run in runs)
+    rows = runs[-1]["rows"]
+    return {
+        "rows": rows,
+        "bytes": runs[-1]["bytes"],
+        "seconds": round(seconds, 3),
+        "rows_per_s": round(rows / seconds, 1) if seconds else 0.0,
+        "mb_per_s": round(runs[-1]["bytes"] / seconds / 1e6, 2) if seconds else 0.0,
+        "ttfb_ms": round(statistics.median(run["ttfb_ms"] for run in runs), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the bulk export")
+    parser.add_argument(
+        "--size", default="10k", help="Catalog size: 10k, 100k, 1m or an integer"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--database-url",
+        help="Database to seed and serve from (default: SQLite file in benchmarks/.work)",
+    )
+    parser.add_argument(
+        "--reseed", action="store_true", help="Regenerate the catalog even if present"
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="Downloads per format")
+    parser.add_argument(
+        "--formats", default="ndjson,csv", help="Comma-separated export formats"
+    )
+    parser.add_argument(
+        "--paged-per-page",
+        type=int,
+        default=25,
+        help="Page size of the /books baseline (0 to skip it)",
+    )
+    parser.add_argument(
+        "--server",
+        choices=["wsgi", "asgi"],
+        default="wsgi",
+        help="Serve with gunicorn (wsgi) or uvicorn (asgi)",
+    )
+    parser.add_argument("--workers", type=int, default=2, help="Server workers")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    database_url, workdir = prepare_catalog(
+        args.database_url, size, args.seed, args.reseed
+    )
+    proc, base_url = start_server(database_url, workdir, args.workers, 1, args.server)
+
+    results = {}
+    try:
+        for fmt in filter(None, args.formats.split(",")):
+            runs = [download_export(base_url, fmt) for _ in range(args.rounds)]
+            results[f"export_{fmt}"] = summarise(runs)
+        if args.paged_per_page > 0:
+            runs = [download_paged(base_url, args.paged_per_page)]
+            results[f"paged_{args.paged_per_page}"] = summarise(runs)
+        peak_rss = server_peak_rss_mb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    for name, summary in results.items():
+        print(
+            f"{name:<14} {summary['rows_per_s']:>12} rows/s  "
+            f"{summary['mb_per_s']:>7} MB/s  ttfb={summary['ttfb_ms']}ms  "
+            f"({summary['rows']} rows in {summary['seconds']}s)"
+        )
+
+    revision = git_revision()
+    report = {
+        "commit": revision,
+        "catalog_size": size,
+        "database": database_url.split(":", 1)[0],
+        "server": args.server,
+        "rounds": args.rounds,
+        "server_peak_rss_mb": peak_rss,
+        "results": results,
+    }
+    print(f"server peak RSS: {peak_rss} MB")
+
+    output = (
+        Path(args.output)
+        if args.output
+        else RESULTS_DIR / f"export-{args.size.lower()}-{revision}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
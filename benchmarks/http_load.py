@@ -0,0 +1,388 @@
+"""
+HTTP load test for the public read endpoints.
+
+Seeds (or reuses) a synthetic catalog, starts the API under gunicorn or
+uvicorn (or targets an already running instance with --base-url) and drives each
+endpoint at a fixed concurrency. Throughput and latency percentiles are
+written as JSON to benchmarks/results/ so runs can be compared across
+commits with `python -m benchmarks.compare`.
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import requests
+
+from benchmarks.catalog import (
+    CATEGORIES,
+    TITLE_WORDS,
+    count_books,
+    parse_size,
+    seed_database,
+    write_csv,
+)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+WORK_DIR = BASE_DIR / "benchmarks" / ".work"
+RESULTS_DIR = BASE_DIR / "benchmarks" / "results"
+
+
+def _scenarios(size: int) -> dict[str, Callable[[random.Random], str]]:
+    pages = max(size // 25, 1)
+    return {
+        "books": lambda rng: f"/api/v1/books?page={rng.randint(1, pages)}",
+        "books_search": lambda rng: (
+            f"/api/v1/books/search?title={rng.choice(TITLE_WORDS)}"
+            f"&category={rng.choice(CATEGORIES[:10])}"
+        ),
+        "book_by_id": lambda rng: f"/api/v1/books/{rng.randint(1, size)}",
+        "categories": lambda rng: "/api/v1/categories",
+        "stats_overview": lambda rng: "/api/v1/stats/overview",
+        "stats_categories": lambda rng: "/api/v1/stats/categories",
+    }
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile over an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def run_scenario(
+    base_url: str,
+    path_factory: Callable[[random.Random], str],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    keep_going: Callable[[], bool] | None = None,
+) -> dict:
+    """
+    Hammer one endpoint from `concurrency` threads for `duration` seconds
+    (and after that for as long as `keep_going()` is true) and summarise the
+    latencies of every request completed after the warmup.
+    """
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    lock = threading.Lock()
+
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def worker(worker_id: int):
+        nonlocal errors
+        rng = random.Random(worker_id)
+        session = requests.Session()
+        local_latencies: list[float] = []
+        local_statuses: Counter = Counter()
+        local_errors = 0
+
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at and not (keep_going and keep_going()):
+                break
+            url = base_url + path_factory(rng)
+            t0 = time.perf_counter()
+            try:
+                response = session.get(url, timeout=30)
+                response.content
+                status = response.status_code
+            except requests.RequestException:
+                status = None
+            t1 = time.perf_counter()
+
+            if t0 < measure_from:
+                continue
+            if status is None:
+                local_errors += 1
+                continue
+            local_latencies.append((t1 - t0) * 1000)
+            local_statuses[status] += 1
+            if status >= 400:
+                local_errors += 1
+
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+            errors += local_errors
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+    latencies.sort()
+    total = len(latencies)
+    elapsed = duration
+    if keep_going:
+        elapsed = max(time.perf_counter() - measure_from, duration)
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(sum(latencies) / total, 3) if total else 0.0,
+            "max": round(latencies[-1], 3) if total else 0.0,
+        },
+        "status_codes": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/api/v1/health", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy in {timeout}s")
+
+
+def start_server(
+    database_url: str,
+    workdir: Path,
+    workers: int,
+    threads: int,
+    server: str = "wsgi",
+) -> tuple[subprocess.Popen, str]:
+    """
+    Launch the API against the benchmark catalog in `workdir` and return
+    the process and its base URL: gunicorn for `server="wsgi"`, uvicorn
+    with the async read endpoints for `server="asgi"`.
+    """
+    port = _free_port()
+    env = dict(os.environ)
+    env["DATABASE_URL"] = database_url
+    env["BOOKS_CSV_PATH"] = str(workdir / "data" / "books.csv")
+    # Measure the API's capacity, not the per-client limits.
+    env.setdefault("RATELIMIT_ENABLED", "0")
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(BASE_DIR), env.get("PYTHONPATH")])
+    )
+
+    if server == "asgi":
+        cmd = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "--workers",
+            str(workers),
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+            "api.asgi:app",
+        ]
+    else:
+        cmd = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--config",
+            str(BASE_DIR / "gunicorn.conf.py"),
+            "--workers",
+            str(workers),
+            "--threads",
+            str(threads),
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--log-level",
+            "warning",
+            "api.main:app",
+        ]
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        _wait_until_ready(base_url)
+    except Exception:
+        proc.terminate()
+        raise
+
+    return proc, base_url
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def prepare_catalog(
+    database_url: str | None, size: int, seed: int, reseed: bool
+) -> tuple[str, Path]:
+    """
+    Make sure a catalog of `size` books exists in the database and as a CSV
+    under the work directory. Returns the database URL and the work dir.
+    """
+    workdir = WORK_DIR / str(size)
+    (workdir / "data").mkdir(parents=True, exist_ok=True)
+
+    if not database_url:
+        database_url = f"sqlite:///{(workdir / 'bench.db').resolve()}"
+
+    if reseed or count_books(database_url) != size:
+        seed_database(database_url, size, seed)
+
+    csv_path = workdir / "data" / "books.csv"
+    if reseed or not csv_path.exists():
+        write_csv(csv_path, size, seed)
+
+    return database_url, workdir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the Book Sommelier API")
+    parser.add_argument(
+        "--size", default="10k", help="Catalog size: 10k, 100k, 1m or an integer"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--database-url",
+        help="Database to seed and serve from (default: SQLite file in benchmarks/.work)",
+    )
+    parser.add_argument(
+        "--base-url", help="Benchmark an already running API instead of starting one"
+    )
+    parser.add_argument(
+        "--reseed", action="store_true", help="Regenerate the catalog even if present"
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds measured per endpoint"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=2.0, help="Seconds discarded per endpoint"
+    )
+    parser.add_argument(
+        "--server",
+        choices=["wsgi", "asgi"],
+        default="wsgi",
+        help="Serve with gunicorn (wsgi) or uvicorn + async DB reads (asgi)",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Server workers")
+    parser.add_argument(
+        "--threads", type=int, default=1, help="gunicorn threads per worker"
+    )
+    parser.add_argument(
+        "--endpoints",
+        help="Comma separated subset of scenarios (default: all)",
+    )
+    parser.add_argument(
+        "--output",
+        help="Result file (default: benchmarks/results/<size>-<commit>.json)",
+    )
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    scenarios = _scenarios(size)
+    if args.endpoints:
+        wanted = [name.strip() for name in args.endpoints.split(",")]
+        unknown = set(wanted) - set(scenarios)
+        if unknown:
+            parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        scenarios = {name: scenarios[name] for name in wanted}
+
+    proc = None
+    database_url = args.database_url
+    if args.base_url:
+        base_url = args.base_url.rstrip("/")
+        server = "external"
+    else:
+        database_url, workdir = prepare_catalog(
+            database_url, size, args.seed, args.reseed
+        )
+        proc, base_url = start_server(
+            database_url, workdir, args.workers, args.threads, args.server
+        )
+        if args.server == "asgi":
+            server = f"uvicorn/{args.workers}w"
+        else:
+            server = f"gunicorn/{args.workers}w{args.threads}t"
+
+    results = {}
+    try:
+        for name, factory in scenarios.items():
+            print(
+                f"Running {name} at concurrency {args.concurrency} for {args.duration}s..."
+            )
+            results[name] = run_scenario(
+                base_url, factory, args.concurrency, args.duration, args.warmup
+            )
+            summary = results[name]
+            print(
+                f"  {summary['throughput_rps']} req/s  "
+                f"p50={summary['latency_ms']['p50']}ms  "
+                f"p95={summary['latency_ms']['p95']}ms  "
+                f"p99={summary['latency_ms']['p99']}ms  "
+                f"errors={summary['errors']}"
+            )
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    revision = git_revision()
+    report = {
+        "commit": revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "catalog_size": size,
+        "seed": args.seed,
+        "database": database_url.split(":", 1)[0] if database_url else "external",
+        "server": server,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "endpoints": results,
+    }
+
+    output = (
+        Path(args.output)
+        if args.output
+        else RESULTS_DIR / f"{args.size.lower()}-{revision}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
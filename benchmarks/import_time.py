@@ -0,0 +1,117 @@
+"""
+Import-time budget for the API workers.
+
+Imports the app module in fresh interpreters with `python -X importtime`,
+reports the wall time and the heaviest top-level imports, and fails when
+one of the lazily loaded modules (pandas, BeautifulSoup, requests, ...)
+is pulled in at startup or the median exceeds --budget-ms.
+
+    python -m benchmarks.import_time --budget-ms 400
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+from benchmarks.http_load import BASE_DIR, git_revision
+
+# Only needed by the CSV fallback of the insights and by admin crawls.
+LAZY_MODULES = ["pandas", "numpy", "bs4", "requests"]
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(" ".join(sorted(sys.modules)))
+"""
+
+
+def measure(module: str) -> dict:
+    """
+    Import `module` in a new interpreter; return the wall time, the loaded
+    module names and the import time spent in each package.
+    """
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(BASE_DIR), env.get("PYTHONPATH")])
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = proc.stdout.strip().splitlines()
+
+    # importtime lines: "import time: self [us] | cumulative | name". Self
+    # times are summed per root package (flask.app -> flask).
+    by_package = Counter()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        by_package[name.strip().split(".")[0]] += int(self_us)
+
+    return {
+        "seconds": float(lines[-2]),
+        "modules": set(lines[-1].split()),
+        "package_us": by_package,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure API import time")
+    parser.add_argument(
+        "--module", default="api.main", help="Module to import (e.g. api.asgi)"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports shown")
+    parser.add_argument(
+        "--budget-ms", type=float, help="Fail when the median import time exceeds it"
+    )
+    parser.add_argument("--output", help="Also write the result as JSON to this file")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    median_ms = statistics.median(run["seconds"] for run in runs) * 1000
+    heaviest = runs[-1]["package_us"].most_common(args.top)
+    loaded = sorted(
+        name for name in LAZY_MODULES if any(name in run["modules"] for run in runs)
+    )
+
+    result = {
+        "commit": git_revision(),
+        "module": args.module,
+        "runs": args.runs,
+        "median_ms": round(median_ms, 1),
+        "heaviest_ms": {name: round(us / 1000, 1) for name, us in heaviest},
+        "eager_heavy_modules": loaded,
+    }
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+            fh.write("\n")
+
+    failures = []
+    if loaded:
+        failures.append(f"imported at startup: {', '.join(loaded)}")
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        failures.append(f"{median_ms:.0f}ms exceeds budget of {args.budget_ms:.0f}ms")
+    if failures:
+        print("FAIL: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
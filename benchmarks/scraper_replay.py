@@ -0,0 +1,96 @@
+"""
+Offline parser throughput benchmark.
+
+Replays a crawl recorded with `python scripts/scraper.py --record DIR`
+through the full BookScraper -> DataStorage pipeline, with no network,
+and reports pages and books parsed per second.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+
+from benchmarks.http_load import git_revision
+from scripts.archive import REPLAY_MODE, HTMLArchive
+from scripts.scraper import BookScraper
+from scripts.storageInterface import DataStorage
+
+
+class CountingStorage(DataStorage):
+    """
+    DataStorage sink that only counts items, so the benchmark measures
+    fetching from the archive and parsing rather than CSV writing.
+    """
+
+    def __init__(self):
+        self.items = 0
+
+    def save_header(self):
+        pass
+
+    def save_item(self, data: dict):
+        self.items += 1
+
+
+class CountingScraper(BookScraper):
+    """
+    BookScraper that counts the pages it fetches from the archive.
+    """
+
+    pages = 0
+
+    def fetch(self, url) -> bytes:
+        self.pages += 1
+        return super().fetch(url)
+
+
+def replay(directory: str, rounds: int = 1, fast: bool = False) -> dict:
+    storage = CountingStorage()
+    pages = 0
+    elapsed = 0.0
+
+    with HTMLArchive(directory, mode=REPLAY_MODE) as archive:
+        for _ in range(rounds):
+            scraper = CountingScraper(storage=storage, archive=archive)
+            start = time.perf_counter()
+            # The scraper reports progress with print(); keep it off the clock.
+            with contextlib.redirect_stdout(io.StringIO()):
+                scraper.run(fast=fast)
+            elapsed += time.perf_counter() - start
+            pages += scraper.pages
+
+    return {
+        "commit": git_revision(),
+        "mode": "fast" if fast else "full",
+        "rounds": rounds,
+        "pages": pages,
+        "books": storage.items,
+        "seconds": round(elapsed, 3),
+        "pages_per_s": round(pages / elapsed, 2) if elapsed else 0.0,
+        "books_per_s": round(storage.items / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a scraper archive offline")
+    parser.add_argument("archive", help="Directory written by scraper.py --record")
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument(
+        "--fast", action="store_true", help="Replay the listing-only scrape"
+    )
+    parser.add_argument("--output", help="Also write the result as JSON to this file")
+    args = parser.parse_args()
+
+    result = replay(args.archive, args.rounds, args.fast)
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+            fh.write("\n")
+
+
+if __name__ == "__main__":
+    main()
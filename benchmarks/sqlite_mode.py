@@ -0,0 +1,209 @@
+"""
+Embedded SQLite mode benchmark: concurrent reads during an import.
+
+For each mode (the default SQLite settings and the embedded mode of
+api/embedded.py) it copies the seeded catalog to a fresh file, starts the
+API on it and drives the read endpoints at a fixed concurrency, first idle
+and then while a separate process imports a CSV of `--import-rows` new
+books (plus the existing ones, which are skipped). Reader throughput,
+latencies and errors and the import time are written per mode to
+benchmarks/results/, in the http_load format, so the two runs can also be
+compared with `python -m benchmarks.compare`.
+
+    python -m benchmarks.sqlite_mode --size 100k --import-rows 100k
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+from benchmarks.catalog import parse_size, write_csv
+from benchmarks.http_load import (
+    RESULTS_DIR,
+    _scenarios,
+    git_revision,
+    prepare_catalog,
+    run_scenario,
+    start_server,
+)
+
+MODES = {"default": "0", "embedded": "1"}
+
+
+def run_import(database_url: str, csv_path: str, embedded: str, results) -> None:
+    """
+    Import `csv_path` the way scripts/insert_books.py does, in its own
+    process (started with the spawn method, so the app is created here).
+    """
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["SQLITE_EMBEDDED"] = embedded
+    os.environ["CATALOG_LISTENER_ENABLED"] = "0"
+
+    from api.main import create_app
+    from api.repositories.book_repository import BookRepository
+    from api.services.book_import_service import BookImportService
+
+    app = create_app()
+    with app.app_context():
+        start = time.perf_counter()
+        result = BookImportService(BookRepository()).import_from_csv(csv_path)
+        result["seconds"] = round(time.perf_counter() - start, 3)
+    results.put(result)
+
+
+def fresh_copy(source: Path, target: Path) -> None:
+    """
+    Copy the catalog and reset it to SQLite's default rollback journal
+    (WAL is persistent, and seeding may have switched it on).
+    """
+    conn = sqlite3.connect(source)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{target}{suffix}").unlink(missing_ok=True)
+    shutil.copyfile(source, target)
+    conn = sqlite3.connect(target)
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.close()
+
+
+def run_mode(
+    mode: str,
+    catalog: Path,
+    workdir: Path,
+    import_csv: Path,
+    scenario,
+    args,
+) -> dict:
+    database = workdir / f"sqlite-{mode}.db"
+    fresh_copy(catalog, database)
+    database_url = f"sqlite:///{database}"
+
+    os.environ["SQLITE_EMBEDDED"] = MODES[mode]
+    proc, base_url = start_server(database_url, workdir, args.workers, args.threads)
+    try:
+        idle = run_scenario(
+            base_url, scenario, args.concurrency, args.duration, args.warmup
+        )
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        importer = context.Process(
+            target=run_import,
+            args=(database_url, str(import_csv), MODES[mode], results),
+        )
+        importer.start()
+        # Measured until the import is over, however long it takes.
+        loaded = run_scenario(
+            base_url,
+            scenario,
+            args.concurrency,
+            args.duration,
+            0,
+            keep_going=importer.is_alive,
+        )
+        importer.join()
+        imported = results.get(timeout=10) if importer.exitcode == 0 else None
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    return {"idle": idle, "during_import": loaded, "import": imported}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare default and embedded SQLite under read + import load"
+    )
+    parser.add_argument(
+        "--size", default="100k", help="Catalog size: 10k, 100k, 1m or an integer"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--import-rows",
+        default="10k",
+        help="New books in the imported CSV: 10k, 100k, 1m or an integer",
+    )
+    parser.add_argument(
+        "--reseed", action="store_true", help="Regenerate the catalog even if present"
+    )
+    parser.add_argument(
+        "--endpoint",
+        default="books",
+        help="http_load scenario driven by the readers",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds measured per phase"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=2.0, help="Seconds discarded before idle"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    parser.add_argument(
+        "--threads", type=int, default=1, help="gunicorn threads per worker"
+    )
+    parser.add_argument(
+        "--modes", default="default,embedded", help="Comma-separated modes to run"
+    )
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    import_rows = parse_size(args.import_rows)
+    scenarios = _scenarios(size)
+    if args.endpoint not in scenarios:
+        parser.error(f"Unknown endpoint: {args.endpoint}")
+
+    database_url, workdir = prepare_catalog(None, size, args.seed, args.reseed)
+    catalog = Path(database_url.removeprefix("sqlite:///"))
+    # Same seed, so the first `size` rows are the catalog and are skipped.
+    import_csv = workdir / "data" / f"import-{import_rows}.csv"
+    if args.reseed or not import_csv.exists():
+        write_csv(import_csv, size + import_rows, args.seed)
+
+    revision = git_revision()
+    for mode in filter(None, args.modes.split(",")):
+        print(f"Running {mode} mode...")
+        result = run_mode(
+            mode, catalog, workdir, import_csv, scenarios[args.endpoint], args
+        )
+
+        for phase in ("idle", "during_import"):
+            summary = result[phase]
+            print(
+                f"  {phase:<14} {summary['throughput_rps']:>9} req/s  "
+                f"p50={summary['latency_ms']['p50']}ms  "
+                f"p99={summary['latency_ms']['p99']}ms  "
+                f"max={summary['latency_ms']['max']}ms  "
+                f"errors={summary['errors']}"
+            )
+        print(f"  import         {result['import']}")
+
+        output = RESULTS_DIR / f"sqlite-{mode}-{args.size.lower()}-{revision}.json"
+        output.parent.mkdir(parents=True, exist_ok=True)
+        report = {
+            "commit": revision,
+            "catalog_size": size,
+            "import_rows": import_rows,
+            "database": "sqlite",
+            "mode": mode,
+            "server": f"gunicorn/{args.workers}w{args.threads}t",
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "import": result["import"],
+            "endpoints": {
+                f"{args.endpoint}_idle": result["idle"],
+                f"{args.endpoint}_during_import": result["during_import"],
+            },
+        }
+        output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"  results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
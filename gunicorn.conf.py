@@ -0,0 +1,26 @@
+"""
+Gunicorn settings, picked up automatically from the working directory
+(`gunicorn api.main:app`).
+
+The app is imported once in the master (`preload_app`) and forked into the
+workers, so the loaded modules and the compiled API spec are shared
+copy-on-write instead of being rebuilt per worker.
+"""
+
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") in ("1", "true", "True")
+
+
+def post_fork(server, worker):
+    # Pooled connections must never be shared between processes. The master
+    # does not query the database, but drop anything it may have opened
+    # (without closing the parent's sockets) so each worker starts with
+    # fresh pools.
+    from api.extensions import db
+    from api.main import app
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
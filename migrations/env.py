@@ -5,6 +5,7 @@ from sqlalchemy import pool
 from alembic import context
 from api.main import db
 from api.models.book import Book
+from api.models.catalog_version import CatalogVersion  # noqa: F401 (registers the table)
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
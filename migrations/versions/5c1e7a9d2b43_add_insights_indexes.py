@@ -0,0 +1,31 @@
+"""Add indexes for insights aggregates
+
+Revision ID: 5c1e7a9d2b43
+Revises: 11ad0d4f6e9a
+Create Date: 2026-10-19 17:12:40.218406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a9d2b43'
+down_revision: Union[str, Sequence[str], None] = '11ad0d4f6e9a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_books_rating', 'books', ['rating'], unique=False)
+    op.create_index('idx_books_category_price', 'books', ['category', 'price'], unique=False)
+    op.create_index('idx_books_price', 'books', ['price'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_books_price', table_name='books')
+    op.drop_index('idx_books_category_price', table_name='books')
+    op.drop_index('idx_books_rating', table_name='books')
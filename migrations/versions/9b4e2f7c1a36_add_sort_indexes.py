@@ -0,0 +1,37 @@
+"""Add (column, id) indexes for sorted listings
+
+Revision ID: 9b4e2f7c1a36
+Revises: 5c1e7a9d2b43
+Create Date: 2026-10-19 17:52:08.614273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4e2f7c1a36'
+down_revision: Union[str, Sequence[str], None] = '5c1e7a9d2b43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The composite indexes have the single-column ones as prefix, so those
+    # are replaced rather than kept alongside.
+    op.create_index('idx_books_price_id', 'books', ['price', 'id'], unique=False)
+    op.create_index('idx_books_rating_id', 'books', ['rating', 'id'], unique=False)
+    op.create_index('idx_books_title_id', 'books', ['title', 'id'], unique=False)
+    op.drop_index('idx_books_price', table_name='books')
+    op.drop_index('idx_books_rating', table_name='books')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('idx_books_rating', 'books', ['rating'], unique=False)
+    op.create_index('idx_books_price', 'books', ['price'], unique=False)
+    op.drop_index('idx_books_title_id', table_name='books')
+    op.drop_index('idx_books_rating_id', table_name='books')
+    op.drop_index('idx_books_price_id', table_name='books')
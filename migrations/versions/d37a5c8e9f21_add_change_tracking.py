@@ -0,0 +1,62 @@
+"""Add change tracking columns and catalog version counter
+
+Revision ID: d37a5c8e9f21
+Revises: 9b4e2f7c1a36
+Create Date: 2026-10-19 18:20:45.903117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd37a5c8e9f21'
+down_revision: Union[str, Sequence[str], None] = '9b4e2f7c1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'catalog_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    # Added nullable, backfilled, then made NOT NULL (batch mode recreates
+    # the table on SQLite).
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('row_version', sa.BigInteger(), nullable=True))
+
+    # Existing rows enter the change feed in id order.
+    op.execute(
+        "UPDATE books SET created_at = CURRENT_TIMESTAMP, "
+        "updated_at = CURRENT_TIMESTAMP, row_version = id"
+    )
+    op.execute(
+        "INSERT INTO catalog_version (id, version) "
+        "SELECT 1, COALESCE(MAX(id), 0) FROM books"
+    )
+
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.alter_column('row_version', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.create_index('idx_books_row_version', ['row_version'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('books') as batch_op:
+        batch_op.drop_index('idx_books_row_version')
+        batch_op.drop_column('row_version')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('created_at')
+
+    op.drop_table('catalog_version')
@@ -0,0 +1,121 @@
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+
+RECORD_MODE = "record"
+REPLAY_MODE = "replay"
+
+
+class HTMLArchive:
+    """
+    On-disk archive of raw HTTP responses, loosely modelled on WARC.
+
+    Each response is stored as its own gzip member appended to
+    `responses.warc.gz`, so the file is a valid multi-member gzip stream and
+    a single record can be decompressed without reading its neighbours.
+    `index.jsonl` maps every URL to the offset and length of its member.
+    """
+
+    DATA_FILE = "responses.warc.gz"
+    INDEX_FILE = "index.jsonl"
+
+    def __init__(self, directory: str, mode: str = REPLAY_MODE):
+        if mode not in (RECORD_MODE, REPLAY_MODE):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.data_path = os.path.join(directory, self.DATA_FILE)
+        self.index_path = os.path.join(directory, self.INDEX_FILE)
+        self._index = {}
+        self._data = None
+        self._index_file = None
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD_MODE
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY_MODE
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self):
+        if self.recording:
+            os.makedirs(self.directory, exist_ok=True)
+            self._data = open(self.data_path, "ab")
+            self._index_file = open(self.index_path, "a", encoding="utf-8")
+        else:
+            self._data = open(self.data_path, "rb")
+
+        if os.path.exists(self.index_path):
+            self._load_index()
+
+    def close(self):
+        for fh in (self._data, self._index_file):
+            if fh:
+                fh.close()
+        self._data = None
+        self._index_file = None
+
+    def _load_index(self):
+        with open(self.index_path, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    # Later records for the same URL win.
+                    self._index[entry["url"]] = entry
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._index
+
+    def urls(self) -> list[str]:
+        return list(self._index)
+
+    def record(self, url: str, status: int, content: bytes):
+        """
+        Append one response to the archive and index it.
+        """
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        header = (
+            "WARC/1.0\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"WARC-Date: {fetched_at}\r\n"
+            f"HTTP-Status: {status}\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            "\r\n"
+        ).encode("utf-8")
+        member = gzip.compress(header + content, compresslevel=6)
+
+        offset = self._data.seek(0, os.SEEK_END)
+        self._data.write(member)
+        self._data.flush()
+
+        entry = {
+            "url": url,
+            "offset": offset,
+            "length": len(member),
+            "status": status,
+            "fetched_at": fetched_at,
+        }
+        self._index_file.write(json.dumps(entry) + "\n")
+        self._index_file.flush()
+        self._index[url] = entry
+
+    def get(self, url: str) -> tuple[int, bytes]:
+        """
+        Return the recorded status code and body for `url`.
+        Raises KeyError if the URL was never recorded.
+        """
+        entry = self._index[url]
+        self._data.seek(entry["offset"])
+        raw = gzip.decompress(self._data.read(entry["length"]))
+        _, body = raw.split(b"\r\n\r\n", 1)
+        return entry["status"], body
@@ -0,0 +1,131 @@
+import json
+import os
+from datetime import datetime, timezone
+
+
+class CrawlCheckpoint:
+    """
+    Crawl progress persisted to disk so an interrupted run can resume.
+
+    `state.json` holds the discovered book URLs and how far listing
+    discovery got; it is rewritten atomically once per listing page.
+    Completed URLs are appended to `completed.log` one per line, which is
+    cheap enough to do after every saved book. Without a directory the
+    checkpoint lives in memory only.
+    """
+
+    STATE_FILE = "state.json"
+    COMPLETED_FILE = "completed.log"
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory
+        self.mode = None
+        self.last_page = 0
+        self.last_listing_page = 0
+        self.discovered = []
+        self.completed = set()
+        self.started_at = None
+        self._completed_file = None
+
+    @classmethod
+    def load(cls, directory: str) -> "CrawlCheckpoint":
+        checkpoint = cls(directory)
+        state_path = os.path.join(directory, cls.STATE_FILE)
+
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as fh:
+                state = json.load(fh)
+            checkpoint.mode = state.get("mode")
+            checkpoint.last_page = state.get("last_page", 0)
+            checkpoint.last_listing_page = state.get("last_listing_page", 0)
+            checkpoint.discovered = state.get("discovered", [])
+            checkpoint.started_at = state.get("started_at")
+
+            completed_path = os.path.join(directory, cls.COMPLETED_FILE)
+            if os.path.exists(completed_path):
+                with open(completed_path, encoding="utf-8") as fh:
+                    checkpoint.completed = {line.strip() for line in fh if line.strip()}
+
+        return checkpoint
+
+    @property
+    def in_progress(self) -> bool:
+        return self.started_at is not None
+
+    def can_resume(self, mode: str) -> bool:
+        return self.in_progress and self.mode == mode
+
+    def start(self, mode: str):
+        """
+        Begin a crawl, discarding any saved progress from a different mode.
+        """
+        if self.can_resume(mode):
+            return
+        self.reset()
+        self.mode = mode
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.save()
+
+    def reset(self):
+        self.close()
+        self.mode = None
+        self.last_page = 0
+        self.last_listing_page = 0
+        self.discovered = []
+        self.completed = set()
+        self.started_at = None
+        if self.directory:
+            for name in (self.STATE_FILE, self.COMPLETED_FILE):
+                path = os.path.join(self.directory, name)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def save(self):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+
+        state = {
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "last_page": self.last_page,
+            "last_listing_page": self.last_listing_page,
+            "discovered": self.discovered,
+        }
+        state_path = os.path.join(self.directory, self.STATE_FILE)
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, state_path)
+
+    def is_completed(self, url: str) -> bool:
+        return url in self.completed
+
+    def mark_completed(self, url: str):
+        self.completed.add(url)
+        if not self.directory:
+            return
+        if self._completed_file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._completed_file = open(
+                os.path.join(self.directory, self.COMPLETED_FILE), "a", encoding="utf-8"
+            )
+        self._completed_file.write(url + "\n")
+        self._completed_file.flush()
+
+    def close(self):
+        if self._completed_file is not None:
+            self._completed_file.close()
+            self._completed_file = None
+
+    def progress(self) -> dict:
+        return {
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "last_page": self.last_page,
+            "last_listing_page": self.last_listing_page,
+            "discovered": len(self.discovered),
+            "completed": len(self.completed),
+        }
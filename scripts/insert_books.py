@@ -58,7 +58,8 @@ def main() -> None:
         result = service.import_from_csv(CSV_PATH)
 
         print(f"✅ Inserted: {result['inserted']}")
-        print(f"⏭️  Ignored (duplicates): {result['skipped']}")
+        print(f"🔁 Updated: {result['updated']}")
+        print(f"⏭️  Ignored (unchanged or duplicate): {result['skipped']}")
 
 
 if __name__ == "__main__":
@@ -1,15 +1,30 @@
+import argparse
+import random
 import re
+import time
 from urllib.parse import urljoin
 
 import requests
 from bs4 import BeautifulSoup
 
+from scripts.archive import RECORD_MODE, REPLAY_MODE, HTMLArchive
+from scripts.checkpoint import CrawlCheckpoint
 from scripts.storageInterface import DataStorage
 from scripts.writer import CSVWriter
 
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
 
 class BookScraper:
-    def __init__(self, storage: DataStorage):
+    def __init__(
+        self,
+        storage: DataStorage,
+        archive: HTMLArchive | None = None,
+        checkpoint: CrawlCheckpoint | None = None,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+    ):
+        self.root_url = "https://books.toscrape.com/"
         self.base_url = "https://books.toscrape.com/catalogue/"
         self.start_url = f"{self.base_url}page-1.html"
         self.headers = {
@@ -18,17 +33,61 @@ class BookScraper:
         self.last_page = 0
         self._books_urls = list()
         self.storage = storage
+        self.archive = archive
+        self.checkpoint = checkpoint if checkpoint is not None else CrawlCheckpoint()
+        self.max_retries = max_retries
+        self.backoff = backoff
 
-    def get_soup(self, url):
+    def _request(self, url):
         """
-        Auxiliary method to avoid repeating request code.
+        GET a URL, retrying connection errors and transient statuses with
+        exponential backoff (backoff * 2**attempt seconds, plus jitter).
         """
-        response = requests.get(url, headers=self.headers)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = requests.get(url, headers=self.headers, timeout=30)
+                if response.status_code not in RETRYABLE_STATUSES:
+                    return response.status_code, response.content
+                error = f"Status {response.status_code}"
+            except requests.RequestException as exc:
+                error = str(exc)
+
+            if attempt == self.max_retries:
+                raise Exception(
+                    f"Error accessing {url} after {attempt + 1} attempts: {error}"
+                )
+
+            delay = self.backoff * (2**attempt) * (1 + random.random() / 2)
+            print(f"Retrying {url} in {delay:.1f}s ({error})")
+            time.sleep(delay)
+
+    def fetch(self, url) -> bytes:
+        """
+        Return the raw HTML for a URL, from the network or, in replay mode,
+        from the archive. In record mode every successful response is
+        archived before being returned.
+        """
+        if self.archive is not None and self.archive.replaying:
+            try:
+                status, content = self.archive.get(url)
+            except KeyError:
+                raise Exception(f"Error accessing {url}: not found in archive")
+        else:
+            status, content = self._request(url)
+
+            if status == 200 and self.archive is not None and self.archive.recording:
+                self.archive.record(url, status, content)
 
-        if response.status_code != 200:
-            raise Exception(f"Error accessing {url}: Status {response.status_code}")
+        if status != 200:
+            raise Exception(f"Error accessing {url}: Status {status}")
 
-        return BeautifulSoup(response.content, "html.parser")
+        return content
+
+    def get_soup(self, url):
+        """
+        Auxiliary method to avoid repeating request code.
+        """
+        return BeautifulSoup(self.fetch(url), "html.parser")
 
     def set_last_page_number(self):
         """
@@ -47,7 +106,23 @@ class BookScraper:
             print(f"Total pages identified: {self.last_page}")
 
     def get_all_books_urls(self):
-        for i in range(1, self.last_page + 1):
+        checkpoint = self.checkpoint
+        self._books_urls = list(checkpoint.discovered)
+
+        for i in range(checkpoint.last_listing_page + 1, self.last_page + 1):
+            self._books_urls.extend(self.get_books_urls(i, i))
+
+            checkpoint.discovered = self._books_urls
+            checkpoint.last_listing_page = i
+            checkpoint.save()
+
+    def get_books_urls(self, first_page: int, last_page: int) -> list[str]:
+        """
+        Relative URLs of the books on listing pages `first_page` to
+        `last_page`, inclusive.
+        """
+        urls = []
+        for i in range(first_page, last_page + 1):
             url = f"{self.base_url}page-{i}.html"
             soup = self.get_soup(url)
 
@@ -58,7 +133,9 @@ class BookScraper:
 
                 relative_url = tag_a["href"]
 
-                self._books_urls.append(relative_url)
+                urls.append(relative_url)
+
+        return urls
 
     def _parse_price_string(self, price_raw: str):
         currency_maps = {"£": "GBP", "€": "EUR", "$": "USD", "R$": "BRL"}
@@ -137,40 +214,205 @@ class BookScraper:
     def save_books(self):
         total = len(self._books_urls)
         for i, book_url in enumerate(self._books_urls, 1):
-            soup = self.get_soup(urljoin(self.base_url, book_url))
-            title = self._find_book_title(soup)
-            currency, price = self._find_book_price(soup)
-            rating = self._find_book_rating(soup)
-            category = self._find_book_category(soup)
-            img_url = self._find_book_image(soup)
-            full_url = urljoin(self.base_url, book_url)
-            data = {
-                "title": title,
-                "price": price,
-                "currency": currency,
-                "rating": rating,
-                "category": category,
-                "img_url": img_url,
-                "url": full_url,
-            }
-
-            print(f"[{i}/{total}] Processing: {title}")
+            if self.checkpoint.is_completed(book_url):
+                continue
+
+            data = self.scrape_book(book_url)
+
+            print(f"[{i}/{total}] Processing: {data['title']}")
             self.storage.save_item(data)
+            self.storage.flush()
+            self.checkpoint.mark_completed(book_url)
+
+    def scrape_book(self, book_url: str) -> dict:
+        """
+        Fetch a product page (URL relative to the catalogue) and return its
+        book record.
+        """
+        soup = self.get_soup(urljoin(self.base_url, book_url))
+        title = self._find_book_title(soup)
+        currency, price = self._find_book_price(soup)
+        rating = self._find_book_rating(soup)
+        category = self._find_book_category(soup)
+        img_url = self._find_book_image(soup)
+        full_url = urljoin(self.base_url, book_url)
+        return {
+            "title": title,
+            "price": price,
+            "currency": currency,
+            "rating": rating,
+            "category": category,
+            "img_url": img_url,
+            "url": full_url,
+        }
 
-    def run(self):
+    def get_category_urls(self) -> list[tuple[str, str]]:
+        """
+        Read the category names and listing URLs from the home page sidebar.
+        """
+        home_url = urljoin(self.root_url, "index.html")
+        soup = self.get_soup(home_url)
+
+        side = soup.find("div", class_="side_categories")
+        categories = []
+
+        for tag_a in side.ul.li.ul.find_all("a"):
+            name = tag_a.get_text(strip=True)
+            categories.append((name, urljoin(home_url, tag_a["href"])))
+
+        return categories
+
+    def _parse_listing_book(self, book, page_url: str, category: str):
+        """
+        Build a book record from a product_pod on a listing page.
+        """
+        tag_a = book.h3.a
+        currency, price = self._parse_price_string(
+            book.find("p", class_="price_color").text
+        )
+
+        img_url = None
+        img_tag = book.find("img")
+        if img_tag and img_tag.get("src"):
+            img_url = urljoin(page_url, img_tag.get("src"))
+
+        return {
+            # The link text is truncated on listings; the title attribute is not.
+            "title": (tag_a.get("title") or tag_a.text).strip(),
+            "price": price,
+            "currency": currency,
+            "rating": self._find_book_rating(book),
+            "category": category,
+            "img_url": img_url,
+            "url": urljoin(page_url, tag_a["href"]),
+        }
+
+    def save_books_fast(self, full_images: bool = False):
+        """
+        Extract every book from the category listing pages alone.
+
+        Each book appears in exactly one category listing, and a listing
+        entry carries the title, price, rating, thumbnail and URL, so the
+        whole catalogue costs one request per listing page (about 60)
+        instead of one per book. Listings only link to the thumbnail; pass
+        `full_images=True` to fetch product pages for the full-size cover.
+        """
+        checkpoint = self.checkpoint
+        seen = set()
+        saved = 0
+
+        for category, category_url in self.get_category_urls():
+            if checkpoint.is_completed(category_url):
+                continue
+
+            page_url = category_url
+            while page_url:
+                soup = self.get_soup(page_url)
+
+                for book in soup.find_all("article", class_="product_pod"):
+                    data = self._parse_listing_book(book, page_url, category)
+                    if data["url"] in seen or checkpoint.is_completed(data["url"]):
+                        continue
+                    seen.add(data["url"])
+
+                    if full_images:
+                        data["img_url"] = self._find_book_image(
+                            self.get_soup(data["url"])
+                        )
+
+                    saved += 1
+                    print(f"[{saved}] Processing: {data['title']}")
+                    self.storage.save_item(data)
+                    self.storage.flush()
+                    checkpoint.mark_completed(data["url"])
+
+                next_link = soup.select_one("ul.pager li.next a")
+                page_url = urljoin(page_url, next_link["href"]) if next_link else None
+
+            checkpoint.mark_completed(category_url)
+
+    def run(self, fast: bool = False, full_images: bool = False):
         """
         Main execution flow
+
+        Progress is recorded in `self.checkpoint`; when it holds an
+        unfinished crawl of the same mode, work already done is skipped.
+        The checkpoint is cleared once the crawl completes.
         """
-        self.set_last_page_number()
-        self.get_all_books_urls()
-        self.save_books()
+        checkpoint = self.checkpoint
+        checkpoint.start("fast" if fast else "full")
+
+        try:
+            if fast:
+                self.save_books_fast(full_images=full_images)
+            else:
+                if checkpoint.last_page:
+                    self.last_page = checkpoint.last_page
+                    print(f"Resuming crawl: {len(checkpoint.completed)} books done")
+                else:
+                    self.set_last_page_number()
+                    checkpoint.last_page = self.last_page
+                    checkpoint.save()
+                self.get_all_books_urls()
+                self.save_books()
+        finally:
+            checkpoint.close()
+
+        checkpoint.reset()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape books.toscrape.com")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="DIR", help="Archive raw responses to DIR")
+    group.add_argument(
+        "--replay", metavar="DIR", help="Parse from the archive in DIR, no network"
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Scrape from category listing pages only, skipping product pages",
+    )
+    parser.add_argument(
+        "--full-images",
+        action="store_true",
+        help="With --fast, still fetch product pages for full-size cover images",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="DIR",
+        help="Persist crawl progress to DIR and resume from it if present",
+    )
+    args = parser.parse_args()
+
     filename = "./data/books"
     fieldnames = ["title", "price", "currency", "rating", "category", "img_url", "url"]
 
-    with CSVWriter(filename, fieldnames) as writer:
-        scraper = BookScraper(storage=writer)
-        writer.save_header()
-        scraper.run()
+    archive = None
+    if args.record:
+        archive = HTMLArchive(args.record, mode=RECORD_MODE)
+    elif args.replay:
+        archive = HTMLArchive(args.replay, mode=REPLAY_MODE)
+
+    checkpoint = CrawlCheckpoint.load(args.checkpoint) if args.checkpoint else None
+    mode = "fast" if args.fast else "full"
+    resuming = (
+        checkpoint is not None
+        and checkpoint.can_resume(mode)
+        and CSVWriter.has_partial(filename)
+    )
+    if checkpoint is not None and not resuming:
+        checkpoint.reset()
+
+    with CSVWriter(filename, fieldnames, append=resuming) as writer:
+        if archive is not None:
+            archive.open()
+        try:
+            scraper = BookScraper(
+                storage=writer, archive=archive, checkpoint=checkpoint
+            )
+            writer.save_header()
+            scraper.run(fast=args.fast, full_images=args.full_images)
+        finally:
+            if archive is not None:
+                archive.close()
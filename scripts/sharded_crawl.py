@@ -0,0 +1,377 @@
+"""
+Sharded crawl: the full crawl split into shards that a pool of worker
+processes, on this machine or on several, take from a shared SQLite queue.
+
+    python scripts/sharded_crawl.py run --queue ./data/sharded/queue.db --processes 4
+
+`run` plans the shards (unless the queue already holds some, in which case
+it resumes), works through them and merges the result. The steps can also
+be run on their own: `plan` once, `work` on every node sharing the queue
+directory, then `merge` when `status` shows every shard done. Only a crawl
+with unfinished (pending, leased or failed) shards is resumed; planning
+over a finished one clears its shards and shard files first.
+
+A shard is either a range of listing pages, whose books are then scraped,
+or a bucket of book URLs grouped by hash. Each shard is written to its own
+CSV, and the merge publishes the shards as one CSV snapshot with duplicate
+URLs dropped.
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from scripts.archive import REPLAY_MODE, HTMLArchive
+from scripts.scraper import BookScraper
+from scripts.storageInterface import DataStorage
+from scripts.work_queue import DONE, FAILED, PENDING, RUNNING, ShardQueue
+from scripts.writer import CSVWriter
+
+FIELDNAMES = ["title", "price", "currency", "rating", "category", "img_url", "url"]
+LEASE_SECONDS = 300.0
+
+
+class LeaseLost(Exception):
+    pass
+
+
+class ShardWriter(DataStorage):
+    """
+    Writes a shard's rows to `<path>.tmp` and renames it to `path` when the
+    `with` block exits cleanly. Shard files are intermediate, so unlike
+    CSVWriter they get no snapshots or manifest.
+    """
+
+    def __init__(self, path: str, fieldnames: list):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.tmp_path = f"{path}.tmp"
+        self.rows = 0
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        self.rows = 0
+        self._file = open(self.tmp_path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        self._writer = None
+
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            os.remove(self.tmp_path)
+
+    def save_header(self):
+        self._writer.writeheader()
+
+    def save_item(self, data):
+        self._writer.writerow(data)
+        self.rows += 1
+
+    def flush(self):
+        self._file.flush()
+
+
+def url_bucket(url: str, buckets: int) -> int:
+    digest = hashlib.sha1(url.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % buckets
+
+
+def plan_page_shards(last_page: int, pages_per_shard: int) -> list[dict]:
+    return [
+        {"pages": [first, min(first + pages_per_shard - 1, last_page)]}
+        for first in range(1, last_page + 1, pages_per_shard)
+    ]
+
+
+def plan_url_shards(urls: list[str], buckets: int) -> list[dict]:
+    grouped = [[] for _ in range(buckets)]
+    for url in dict.fromkeys(urls):
+        grouped[url_bucket(url, buckets)].append(url)
+    return [
+        {"bucket": bucket, "urls": bucket_urls}
+        for bucket, bucket_urls in enumerate(grouped)
+        if bucket_urls
+    ]
+
+
+def shard_dir(queue_path: str) -> str:
+    return os.path.join(os.path.dirname(queue_path) or ".", "shards")
+
+
+def clear_crawl(queue_path: str) -> int:
+    """
+    Forget a finished crawl: drop its shards from the queue and delete the
+    shard files. Returns the number of shards dropped.
+    """
+    with ShardQueue(queue_path) as queue:
+        cleared = queue.clear()
+    for path in glob.glob(os.path.join(shard_dir(queue_path), "shard-*.csv*")):
+        os.remove(path)
+    return cleared
+
+
+def _open_archive(replay: str | None) -> HTMLArchive | None:
+    if not replay:
+        return None
+    archive = HTMLArchive(replay, mode=REPLAY_MODE)
+    archive.open()
+    return archive
+
+
+def plan(
+    queue_path: str,
+    shard_by: str = "pages",
+    pages_per_shard: int = 5,
+    buckets: int = 16,
+    replay: str | None = None,
+) -> int:
+    """
+    Discover the catalog size (and, for URL buckets, every book URL) and
+    queue the shards. Returns the number of shards queued.
+    """
+    archive = _open_archive(replay)
+    try:
+        scraper = BookScraper(storage=None, archive=archive)
+        scraper.set_last_page_number()
+        if shard_by == "pages":
+            specs = plan_page_shards(scraper.last_page, pages_per_shard)
+        else:
+            urls = scraper.get_books_urls(1, scraper.last_page)
+            specs = plan_url_shards(urls, buckets)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    with ShardQueue(queue_path) as queue:
+        queue.add(specs)
+    return len(specs)
+
+
+def crawl_shard(scraper: BookScraper, spec: dict, heartbeat) -> None:
+    if "pages" in spec:
+        first, last = spec["pages"]
+        urls = scraper.get_books_urls(first, last)
+    else:
+        urls = spec["urls"]
+
+    for url in urls:
+        scraper.storage.save_item(scraper.scrape_book(url))
+        heartbeat()
+
+
+def work(
+    queue_path: str,
+    replay: str | None = None,
+    lease: float = LEASE_SECONDS,
+    max_attempts: int = 3,
+) -> int:
+    """
+    Take shards from the queue until it is empty. Returns the number of
+    shards this worker completed.
+    """
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    directory = shard_dir(queue_path)
+    os.makedirs(directory, exist_ok=True)
+    archive = _open_archive(replay)
+    completed = 0
+
+    try:
+        with ShardQueue(queue_path, max_attempts=max_attempts) as queue:
+            while (claimed := queue.claim(worker, lease)) is not None:
+                shard_id, spec = claimed
+                renew_at = time.monotonic() + lease / 3
+
+                def heartbeat():
+                    nonlocal renew_at
+                    if time.monotonic() < renew_at:
+                        return
+                    if not queue.renew(shard_id, worker, lease):
+                        raise LeaseLost(
+                            f"Shard {shard_id} was handed to another worker"
+                        )
+                    renew_at = time.monotonic() + lease / 3
+
+                # One file per worker, so a worker that lost its lease never
+                # writes over the one that took the shard over.
+                output = os.path.join(directory, f"shard-{shard_id:05d}-{worker}.csv")
+                try:
+                    with ShardWriter(output, FIELDNAMES) as writer:
+                        writer.save_header()
+                        scraper = BookScraper(storage=writer, archive=archive)
+                        crawl_shard(scraper, spec, heartbeat)
+                except Exception as exc:
+                    print(f"Shard {shard_id} failed: {exc}")
+                    queue.fail(shard_id, worker, str(exc))
+                    continue
+
+                queue.complete(shard_id, worker, output, writer.rows)
+                completed += 1
+                print(f"Shard {shard_id} done: {writer.rows} books")
+    finally:
+        if archive is not None:
+            archive.close()
+
+    return completed
+
+
+def work_in_pool(queue_path: str, processes: int, **options) -> int:
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(work, queue_path, **options) for _ in range(processes)]
+        return sum(future.result() for future in futures)
+
+
+def merge_shards(paths: list[str], filename: str) -> dict:
+    """
+    Publish the rows of the shard CSVs as one snapshot at `filename`,
+    keeping the first row seen for each URL.
+    """
+    seen = set()
+    duplicates = 0
+    with CSVWriter(filename, FIELDNAMES) as writer:
+        writer.save_header()
+        for path in paths:
+            with open(path, newline="", encoding="utf-8") as fh:
+                for row in csv.DictReader(fh):
+                    if row["url"] in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(row["url"])
+                    writer.save_item(row)
+
+    return {"shards": len(paths), "rows": len(seen), "duplicates": duplicates}
+
+
+def merge(queue_path: str, filename: str, allow_failed: bool = False) -> dict:
+    with ShardQueue(queue_path) as queue:
+        progress = queue.progress()
+        unfinished = len(queue) - progress[DONE] - progress[FAILED]
+        if unfinished:
+            raise RuntimeError(f"{unfinished} shards are not finished yet")
+        if progress[FAILED] and not allow_failed:
+            failures = ", ".join(f"#{i} ({error})" for i, error in queue.failures())
+            raise RuntimeError(f"Failed shards: {failures}")
+        paths = queue.outputs()
+
+    return merge_shards(paths, filename)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sharded multi-process crawl")
+    parser.add_argument("command", choices=["run", "plan", "work", "merge", "status"])
+    parser.add_argument(
+        "--queue",
+        default="./data/sharded/queue.db",
+        help="SQLite work queue shared by the workers",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=["pages", "urls"],
+        default="pages",
+        help="Split by listing page ranges or by book URL hash buckets",
+    )
+    parser.add_argument("--pages-per-shard", type=int, default=5)
+    parser.add_argument(
+        "--buckets", type=int, default=16, help="Hash buckets with --shard-by urls"
+    )
+    parser.add_argument(
+        "--processes", type=int, default=os.cpu_count() or 1, help="Worker processes"
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=LEASE_SECONDS,
+        help="Seconds before a silent worker's shard is handed to another",
+    )
+    parser.add_argument(
+        "--max-attempts", type=int, default=3, help="Attempts per shard"
+    )
+    parser.add_argument(
+        "--replay", metavar="DIR", help="Fetch pages from the archive in DIR"
+    )
+    parser.add_argument(
+        "--output", default="./data/books", help="Merged CSV (published as a snapshot)"
+    )
+    parser.add_argument(
+        "--allow-failed",
+        action="store_true",
+        help="Merge even if some shards failed every attempt",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="With run or work, queue failed shards again first",
+    )
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.queue) or ".", exist_ok=True)
+    with ShardQueue(args.queue) as queue:
+        if args.retry_failed:
+            print(f"Requeued {queue.retry_failed()} failed shards")
+        progress = queue.progress()
+    unfinished = progress[PENDING] + progress[RUNNING] + progress[FAILED]
+
+    if args.command == "status":
+        with ShardQueue(args.queue) as queue:
+            print(queue.progress())
+            for shard_id, error in queue.failures():
+                print(f"Shard {shard_id} failed: {error}")
+        return
+
+    if args.command in ("plan", "run"):
+        if unfinished:
+            if args.command == "plan":
+                sys.exit(f"{args.queue} holds {unfinished} unfinished shards")
+            print(
+                f"Resuming {unfinished} unfinished shards "
+                "(the shard options of the original plan apply)"
+            )
+        else:
+            if progress[DONE]:
+                cleared = clear_crawl(args.queue)
+                print(f"Cleared {cleared} shards of the previous crawl")
+            count = plan(
+                args.queue,
+                args.shard_by,
+                args.pages_per_shard,
+                args.buckets,
+                args.replay,
+            )
+            print(f"Planned {count} shards")
+
+    if args.command in ("work", "run"):
+        completed = work_in_pool(
+            args.queue,
+            args.processes,
+            replay=args.replay,
+            lease=args.lease,
+            max_attempts=args.max_attempts,
+        )
+        print(f"Completed {completed} shards")
+
+    if args.command in ("merge", "run"):
+        try:
+            result = merge(args.queue, args.output, args.allow_failed)
+        except RuntimeError as exc:
+            sys.exit(f"Not merging: {exc}")
+        print(
+            f"Merged {result['shards']} shards: {result['rows']} books, "
+            f"{result['duplicates']} duplicates dropped"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+SNAPSHOT_DIR = "snapshots"
+
+
+def snapshot_dir(target: str) -> str:
+    return os.path.join(os.path.dirname(target) or ".", SNAPSHOT_DIR)
+
+
+def snapshot_basename(target: str) -> str:
+    return os.path.splitext(os.path.basename(target))[0]
+
+
+def manifest_path(target: str) -> str:
+    return os.path.join(
+        snapshot_dir(target), f"{snapshot_basename(target)}.manifest.json"
+    )
+
+
+def new_version() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def fsync_directory(directory: str):
+    """
+    Persist a rename. Not every platform can open a directory; skip there.
+    """
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_json_atomic(path: str, payload: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_manifest(target: str) -> dict:
+    try:
+        with open(manifest_path(target), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {"current": None, "snapshots": []}
+
+
+def publish(target: str, snapshot_file: str):
+    """
+    Atomically make `snapshot_file` visible at `target`.
+
+    A hard link shares the snapshot's pages instead of copying them; the
+    link is created under a temporary name and renamed over the target, so
+    readers see either the old file or the new one, never a mix.
+    """
+    tmp_target = f"{target}.publish"
+    if os.path.exists(tmp_target):
+        os.remove(tmp_target)
+    try:
+        os.link(snapshot_file, tmp_target)
+    except OSError:
+        shutil.copyfile(snapshot_file, tmp_target)
+    os.replace(tmp_target, target)
+    fsync_directory(os.path.dirname(target))
+
+
+def record_snapshot(target: str, entry: dict, keep: int) -> dict:
+    """
+    Add `entry` as the current snapshot in the manifest, drop snapshots
+    beyond the newest `keep`, and return the updated manifest.
+    """
+    directory = snapshot_dir(target)
+    manifest = read_manifest(target)
+
+    snapshots = [entry] + [
+        s for s in manifest.get("snapshots", []) if s["version"] != entry["version"]
+    ]
+    kept, dropped = snapshots[:keep], snapshots[keep:]
+
+    manifest = {"current": entry["version"], "snapshots": kept}
+    write_json_atomic(manifest_path(target), manifest)
+
+    for old in dropped:
+        path = os.path.join(directory, old["file"])
+        if os.path.exists(path):
+            os.remove(path)
+
+    return manifest
+
+
+def snapshot_identity(target: str):
+    """
+    Cheap identity of the file currently published at `target`, for reader
+    caches. Every publish renames a new inode into place, so (inode, size,
+    mtime) changes whenever the content can have changed. Returns None if
+    the file does not exist.
+    """
+    try:
+        st = os.stat(target)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
@@ -1,10 +1,17 @@
 from abc import ABC, abstractmethod
 
+
 class DataStorage(ABC):
     @abstractmethod
     def save_header(self):
         pass
-    
+
     @abstractmethod
     def save_item(self, data: dict):
         pass
+
+    def flush(self):
+        """
+        Hand saved items to the OS so they survive the process being
+        killed; called before a crawl checkpoints them as completed.
+        """
@@ -0,0 +1,162 @@
+import json
+import sqlite3
+import time
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class ShardQueue:
+    """
+    Crawl shards in a SQLite file shared by every worker process, or by
+    workers on other nodes when it lives on a filesystem with working
+    locks.
+
+    A worker claims a shard by taking a lease on it, renews the lease while
+    it works and records the shard's output when done. A shard whose lease
+    runs out (its worker died) goes back to the queue, and so does one that
+    failed, until it has been attempted `max_attempts` times.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        # Autocommit, so every claim can run in its own BEGIN IMMEDIATE.
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS shards (
+                id INTEGER PRIMARY KEY,
+                spec TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_expires REAL,
+                output TEXT,
+                rows INTEGER,
+                error TEXT
+            )
+            """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def add(self, specs: list[dict]):
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT INTO shards (spec) VALUES (?)",
+                [(json.dumps(spec),) for spec in specs],
+            )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM shards").fetchone()[0]
+
+    def claim(self, worker: str, lease: float) -> tuple[int, dict] | None:
+        """
+        Lease the next pending (or abandoned) shard to `worker` for `lease`
+        seconds. Returns (shard id, spec), or None when nothing is left.
+        """
+        now = time.time()
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            # Abandoned shards that already used up their attempts.
+            self._conn.execute(
+                "UPDATE shards SET status = ?, error = 'lease expired' "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, RUNNING, now, self.max_attempts),
+            )
+            row = self._conn.execute(
+                "SELECT id, spec FROM shards "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (PENDING, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE shards SET status = ?, worker = ?, attempts = attempts + 1, "
+                "lease_expires = ?, error = NULL WHERE id = ?",
+                (RUNNING, worker, now + lease, row[0]),
+            )
+        return row[0], json.loads(row[1])
+
+    def renew(self, shard_id: int, worker: str, lease: float) -> bool:
+        """
+        Extend the lease; False if the shard has been handed to another
+        worker in the meantime.
+        """
+        with self._conn:
+            cursor = self._conn.execute(
+                "UPDATE shards SET lease_expires = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (time.time() + lease, shard_id, worker, RUNNING),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, shard_id: int, worker: str, output: str, rows: int):
+        with self._conn:
+            self._conn.execute(
+                "UPDATE shards SET status = ?, output = ?, rows = ?, "
+                "lease_expires = NULL WHERE id = ? AND worker = ? AND status = ?",
+                (DONE, output, rows, shard_id, worker, RUNNING),
+            )
+
+    def fail(self, shard_id: int, worker: str, error: str):
+        with self._conn:
+            self._conn.execute(
+                "UPDATE shards SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "error = ?, lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (self.max_attempts, FAILED, PENDING, error, shard_id, worker, RUNNING),
+            )
+
+    def clear(self) -> int:
+        """
+        Drop every shard, to plan a new crawl in the same queue.
+        """
+        with self._conn:
+            cursor = self._conn.execute("DELETE FROM shards")
+        return cursor.rowcount
+
+    def retry_failed(self) -> int:
+        """
+        Queue failed shards again with a fresh set of attempts.
+        """
+        with self._conn:
+            cursor = self._conn.execute(
+                "UPDATE shards SET status = ?, attempts = 0 WHERE status = ?",
+                (PENDING, FAILED),
+            )
+        return cursor.rowcount
+
+    def progress(self) -> dict:
+        counts = {status: 0 for status in (PENDING, RUNNING, DONE, FAILED)}
+        for status, count in self._conn.execute(
+            "SELECT status, COUNT(*) FROM shards GROUP BY status"
+        ):
+            counts[status] = count
+        return counts
+
+    def outputs(self) -> list[str]:
+        """
+        Output files of the finished shards, in shard order.
+        """
+        return [
+            output
+            for (output,) in self._conn.execute(
+                "SELECT output FROM shards WHERE status = ? ORDER BY id", (DONE,)
+            )
+        ]
+
+    def failures(self) -> list[tuple[int, str]]:
+        return self._conn.execute(
+            "SELECT id, error FROM shards WHERE status = ? ORDER BY id", (FAILED,)
+        ).fetchall()
@@ -1,37 +1,157 @@
 import csv
+import hashlib
 import os
+from datetime import datetime, timezone
 
+from scripts.snapshots import (
+    fsync_directory,
+    new_version,
+    publish,
+    record_snapshot,
+    snapshot_basename,
+    snapshot_dir,
+)
 from scripts.storageInterface import DataStorage
 
 
+class _HashingFile:
+    """
+    Text-mode facade over a binary file that hashes everything written.
+    """
+
+    def __init__(self, raw, digest):
+        self.raw = raw
+        self.digest = digest
+
+    def write(self, text: str):
+        data = text.encode("utf-8")
+        self.digest.update(data)
+        return self.raw.write(data)
+
+
 class CSVWriter(DataStorage):
-    def __init__(self, filename: str, fieldnames: list):
+    """
+    Writes rows to `<filename>.partial` and, when the `with` block exits
+    cleanly, publishes them as a new snapshot: the partial file is fsynced,
+    renamed into `snapshots/` and atomically swapped in at `filename`.
+    Readers of `filename` therefore never see a half-written file.
+
+    The newest `keep_snapshots` versions are kept alongside a manifest
+    recording each one's row count and SHA-256. If the block raises, the
+    partial file is left in place so an `append=True` writer can continue it.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        fieldnames: list,
+        append: bool = False,
+        keep_snapshots: int = 5,
+        buffer_size: int = 1024 * 1024,
+    ):
         if not filename.endswith(".csv"):
             filename += ".csv"
         self.filename = filename
         self.fieldnames = fieldnames
+        self.append = append
+        self.keep_snapshots = keep_snapshots
+        self.buffer_size = buffer_size
+        self.partial_filename = self.partial_path(filename)
+        self.snapshot = None
         self._file = None
         self._writer = None
+        self._digest = None
+        self._rows = 0
+        self._has_rows = False
         self._prepare_directory()
 
+    @staticmethod
+    def partial_path(filename: str) -> str:
+        if not filename.endswith(".csv"):
+            filename += ".csv"
+        return f"{filename}.partial"
+
+    @classmethod
+    def has_partial(cls, filename: str) -> bool:
+        return os.path.exists(cls.partial_path(filename))
+
     def _prepare_directory(self):
         directory = os.path.dirname(self.filename)
         if directory:
             os.makedirs(directory, exist_ok=True)
 
     def __enter__(self):
-        self._file = open(self.filename, "w", newline="", encoding="utf-8")
-        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        self._digest = hashlib.sha256()
+        self._rows = 0
+        # Appending continues an interrupted run, whose header is already
+        # there, unless the run was killed before anything reached the file.
+        self._has_rows = self.append and self._partial_has_header()
+
+        if self._has_rows:
+            with open(self.partial_filename, "rb") as fh:
+                for block in iter(lambda: fh.read(self.buffer_size), b""):
+                    self._digest.update(block)
+            with open(self.partial_filename, newline="", encoding="utf-8") as fh:
+                self._rows = max(sum(1 for _ in csv.reader(fh)) - 1, 0)
+
+        mode = "ab" if self._has_rows else "wb"
+        self._file = open(self.partial_filename, mode, buffering=self.buffer_size)
+        self._writer = csv.DictWriter(
+            _HashingFile(self._file, self._digest), fieldnames=self.fieldnames
+        )
         return self
 
+    def _partial_has_header(self) -> bool:
+        try:
+            with open(self.partial_filename, newline="", encoding="utf-8") as fh:
+                return next(csv.reader(fh), None) == self.fieldnames
+        except OSError:
+            return False
+
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self._file:
-            self._file.close()
+        if not self._file:
+            return
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        self._writer = None
+
+        if exc_type is None:
+            self._publish()
+
+    def _publish(self):
+        version = new_version()
+        base = snapshot_basename(self.filename)
+        directory = snapshot_dir(self.filename)
+        os.makedirs(directory, exist_ok=True)
+
+        snapshot_name = f"{base}-{version}.csv"
+        snapshot_file = os.path.join(directory, snapshot_name)
+        os.replace(self.partial_filename, snapshot_file)
+        fsync_directory(directory)
+
+        publish(self.filename, snapshot_file)
+
+        self.snapshot = {
+            "version": version,
+            "file": snapshot_name,
+            "rows": self._rows,
+            "sha256": self._digest.hexdigest(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        record_snapshot(self.filename, self.snapshot, self.keep_snapshots)
 
     def save_header(self):
-        if self._writer:
+        if self._writer and not self._has_rows:
             self._writer.writeheader()
 
     def save_item(self, data):
         if self._writer:
             self._writer.writerow(data)
+            self._rows += 1
+
+    def flush(self):
+        if self._file:
+            self._file.flush()